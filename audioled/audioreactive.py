@@ -1,13 +1,14 @@
 from __future__ import (absolute_import, division, print_function, unicode_literals)
 
 import colorsys
+import functools
 import math
 import random
 from collections import OrderedDict
 
 import numpy as np
 import scipy as sp
-from scipy.ndimage.filters import gaussian_filter1d
+from scipy.ndimage import convolve1d
 
 import audioled.colors as colors
 import audioled.dsp as dsp
@@ -17,6 +18,31 @@ import audioled.effect as effect
 import logging
 logger = logging.getLogger(__name__)
 
+# Kernel of gaussian_filter1d with sigma=0.5
+_gaussian_kernel = np.exp(-2.0 * np.arange(-2, 3)**2)
+_gaussian_kernel /= np.sum(_gaussian_kernel)
+# Kernel of two consecutive gaussian_filter1d with sigma=0.5
+_gaussian_kernel_twice = np.convolve(_gaussian_kernel, _gaussian_kernel)
+
+
+@functools.lru_cache(maxsize=8)
+def _vu_meter_color(num_pixels, db_range):
+    """Default color of the VU meters.
+
+    Green from -inf to -24 dB, green to red from -24 to 0 dB.
+    The returned array is shared between callers and therefore read-only.
+    """
+    h_a, s_a, v_a = colorsys.rgb_to_hsv(0, 1, 0)
+    h_b, s_b, v_b = colorsys.rgb_to_hsv(1, 0, 0)
+    scal_value = max((db_range + (-24)) / db_range, 0)  # clip to positive if db_range < 24
+    index = int(num_pixels * scal_value)
+    num_pix = num_pixels - index
+    hsv = np.linspace([h_a, s_a, v_a], [h_b, s_b, v_b], num_pix, axis=1) * 255
+    green = np.tile(np.array([[0.0], [255.0], [0.0]]), (1, index))
+    color = np.concatenate((green, colors.hsv_to_rgb(hsv)), axis=1).astype(np.float32)
+    color.setflags(write=False)
+    return color
+
 # TODO: Adjustable Frequency for Bass and Melody
 # TODO: Single Band version
 class Spectrum(Effect):
@@ -49,7 +75,11 @@ class Spectrum(Effect):
         # state
         self._norm_dist = None
         self.fft_bins = 64
-        self._fft_dist = np.linspace(0, 1, self.fft_bins)
+        self._interp_idx = None
+        self._interp_weights = None
+        self._default_color = None
+        self._bass_pixels = None
+        self._melody_pixels = None
         self._max_filter = np.ones(8)
         self._min_feature_win = np.hamming(8)
         self._fs_ds = 0.0
@@ -111,6 +141,16 @@ class Spectrum(Effect):
             return
         if self._norm_dist is None or len(self._norm_dist) != self._num_pixels:
             self._norm_dist = np.linspace(0, 1, self._num_pixels)
+            # linear interpolation from fft bins to pixels: index of the left bin and weights of both bins
+            pos = self._norm_dist * (self.fft_bins - 1)
+            self._interp_idx = np.minimum(pos.astype(int), self.fft_bins - 2)
+            w_right = pos - self._interp_idx
+            self._interp_weights = (1.0 - w_right, w_right)
+            # default color: all white
+            self._default_color = np.full((3, self._num_pixels), 255.0, dtype=np.float32)
+            # scratch buffers for colored bass and melody
+            self._bass_pixels = np.empty((3, self._num_pixels), dtype=np.float32)
+            self._melody_pixels = np.empty((3, self._num_pixels), dtype=np.float32)
 
     def process(self):
         if self._inputBuffer is None or self._outputBuffer is None:
@@ -123,11 +163,9 @@ class Spectrum(Effect):
         col_melody = self._inputBuffer[1]
         col_bass = self._inputBuffer[2]
         if col_melody is None:
-            # default color: all white
-            col_melody = np.ones(self._num_pixels) * np.array([[255.0], [255.0], [255.0]])
+            col_melody = self._default_color
         if col_bass is None:
-            # default color: all white
-            col_bass = np.ones(self._num_pixels) * np.array([[255.0], [255.0], [255.0]])
+            col_bass = self._default_color
         if audio is not None:
             if self._gen is None:
                 g = self.buffer_coroutine()
@@ -136,16 +174,16 @@ class Spectrum(Effect):
                 self._gen = self._audio_gen(g)
             self._lastAudioChunk = audio
             y = next(self._gen)
-            bass = dsp.warped_psd(y, self.fft_bins, self._fs_ds, [32.7, 261.0], 'bark')
-            melody = dsp.warped_psd(y, self.fft_bins, self._fs_ds, [261.0, self.fmax], 'bark')
+            bass, melody = dsp.warped_psd_multi(y, self.fft_bins, self._fs_ds, [[32.7, 261.0], [261.0, self.fmax]],
+                                                'bark')
             bass = self.process_line(bass)
             melody = self.process_line(melody)
             pixels = colors.blend(
-                1. / 255.0 * np.multiply(col_bass, bass),
-                1. / 255. * np.multiply(col_melody, melody),
+                np.multiply(col_bass, bass, out=self._bass_pixels),
+                np.multiply(col_melody, melody, out=self._melody_pixels),
                 self.col_blend,
             )
-            self._outputBuffer[0] = pixels.clip(0, 255).astype(int)
+            self._outputBuffer[0] = np.clip(pixels, 0, 255, out=pixels)
 
     def process_line(self, fft):
 
@@ -157,12 +195,14 @@ class Spectrum(Effect):
         # fft = np.tanh(fft / np.max(fft_rms)) * 255
 
         # Upsample to number of pixels
-        fft = np.interp(self._norm_dist, self._fft_dist, fft)
+        w_left, w_right = self._interp_weights
+        fft = w_left * fft[self._interp_idx] + w_right * fft[self._interp_idx + 1]
 
         #
         fft = np.convolve(fft, self._min_feature_win, 'same')
 
-        return fft * 255
+        # Brightness factor for the color input, i.e. already divided by 255
+        return fft.astype(np.float32)
 
 
 class VUMeterRMS(Effect):
@@ -189,9 +229,11 @@ class VUMeterRMS(Effect):
 
     def __initstate__(self):
         super().__initstate__()
-        self._hold_values = []
+        self._hold_values = None
         self._bandpass = None
         self._default_color = None
+        self._default_color_key = None
+        self._bar = None
 
     def numInputChannels(self):
         return 2
@@ -229,25 +271,11 @@ class VUMeterRMS(Effect):
         await super().update(dt)
         if self._num_pixels is None:
             return
-        if self._default_color is None or np.size(self._default_color, 1) != self._num_pixels:
-            # default color: VU Meter style
-            # green from -inf to -24
-            # green to red from -24 to 0
-            h_a, s_a, v_a = colorsys.rgb_to_hsv(0, 1, 0)
-            h_b, s_b, v_b = colorsys.rgb_to_hsv(1, 0, 0)
-            scal_value = max((self.db_range + (-24)) / self.db_range, 0)  # clip to positive if db_range < 24
-            index = int(self._num_pixels * scal_value)
-            num_pix = self._num_pixels - index
-            interp_v = np.linspace(v_a, v_b, num_pix)
-            interp_s = np.linspace(s_a, s_b, num_pix)
-            interp_h = np.linspace(h_a, h_b, num_pix)
-            hsv = np.array([interp_h, interp_s, interp_v]) * 255
-            rgb = colors.hsv_to_rgb(hsv).T
-            if (index > 0):
-                green = np.array([[0, 255.0, 0] for i in range(index)]).T
-                self._default_color = np.concatenate((green, rgb.T), axis=1)
-            else:
-                self._default_color = rgb.T
+        if self._default_color_key != (self._num_pixels, self.db_range):
+            self._default_color = _vu_meter_color(self._num_pixels, self.db_range)
+            self._default_color_key = (self._num_pixels, self.db_range)
+        if self._bar is None or np.size(self._bar, 1) != self._num_pixels:
+            self._bar = np.empty((3, self._num_pixels), dtype=np.float32)
 
     def process(self):
         if self._inputBuffer is None or self._outputBuffer is None:
@@ -269,21 +297,23 @@ class VUMeterRMS(Effect):
             # update bandpass
             self._bandpass.updateParams(self.lowcut_hz, self.highcut_hz, fs, 3)
             # process audio
-            y = self._bandpass.filter(np.array(y), fs)
+            y = self._bandpass.filter(np.asarray(y), fs)
 
         rms = dsp.rms(y)
         # calculate rms over hold_time
-        while len(self._hold_values) > self.n_overlaps:
-            self._hold_values.pop()
-        self._hold_values.insert(0, rms)
-        rms = dsp.rms(self._hold_values)
-        db = 20 * math.log10(max(rms, 1e-16))
-        scal_value = (self.db_range + db) / self.db_range
-        bar = np.zeros(self._num_pixels) * np.array([[0], [0], [0]])
+        if self._hold_values is None:
+            self._hold_values = dsp.RollingRms(int(self.n_overlaps) + 1)
+        else:
+            # n_overlaps can be modulated, keep the hold history
+            self._hold_values.resize(int(self.n_overlaps) + 1)
+        rms = self._hold_values.push(rms)
+        db = dsp.amplitude_to_db(rms)
+        scal_value = 1.0 + db / self.db_range
         index = int(self._num_pixels * scal_value)
         index = np.clip(index, 0, self._num_pixels - 1)
-        bar[0:3, 0:index] = color[0:3, 0:index]
-        self._outputBuffer[0] = bar
+        self._bar[:, :index] = color[0:3, :index]
+        self._bar[:, index:] = 0.0
+        self._outputBuffer[0] = self._bar
 
 
 class VUMeterPeak(Effect):
@@ -310,9 +340,11 @@ class VUMeterPeak(Effect):
 
     def __initstate__(self):
         super().__initstate__()
-        self._hold_values = []
+        self._hold_values = None
         self._bandpass = None
         self._default_color = None
+        self._default_color_key = None
+        self._bar = None
 
     def numInputChannels(self):
         return 2
@@ -350,25 +382,11 @@ class VUMeterPeak(Effect):
         await super().update(dt)
         if self._num_pixels is None:
             return
-        if self._default_color is None or np.size(self._default_color, 1) != self._num_pixels:
-            # default color: VU Meter style
-            # green from -inf to -24
-            # green to red from -24 to 0
-            h_a, s_a, v_a = colorsys.rgb_to_hsv(0, 1, 0)
-            h_b, s_b, v_b = colorsys.rgb_to_hsv(1, 0, 0)
-            scal_value = max((self.db_range + (-24)) / self.db_range, 0)  # clip to positive if db_range < 24
-            index = int(self._num_pixels * scal_value)
-            num_pix = self._num_pixels - index
-            interp_v = np.linspace(v_a, v_b, num_pix)
-            interp_s = np.linspace(s_a, s_b, num_pix)
-            interp_h = np.linspace(h_a, h_b, num_pix)
-            hsv = np.array([interp_h, interp_s, interp_v]) * 255
-            rgb = colors.hsv_to_rgb(hsv).T
-            if (index > 0):
-                green = np.array([[0, 255.0, 0] for i in range(index)]).T
-                self._default_color = np.concatenate((green, rgb.T), axis=1)
-            else:
-                self._default_color = rgb.T
+        if self._default_color_key != (self._num_pixels, self.db_range):
+            self._default_color = _vu_meter_color(self._num_pixels, self.db_range)
+            self._default_color_key = (self._num_pixels, self.db_range)
+        if self._bar is None or np.size(self._bar, 1) != self._num_pixels:
+            self._bar = np.empty((3, self._num_pixels), dtype=np.float32)
 
     def process(self):
         if self._inputBuffer is None or self._outputBuffer is None:
@@ -390,22 +408,24 @@ class VUMeterPeak(Effect):
             # update bandpass params
             self._bandpass.updateParams(self.lowcut_hz, self.highcut_hz, fs, 3)
             # process audio
-            y = self._bandpass.filter(np.array(y), fs)
+            y = self._bandpass.filter(np.asarray(y), fs)
 
-        peak = np.max(y)
+        peak = float(np.max(y))
         # calculate max over hold_time
-        while len(self._hold_values) > self.n_overlaps:
-            self._hold_values.pop()
-        self._hold_values.insert(0, peak)
-        peak = np.max(self._hold_values)
+        if self._hold_values is None:
+            self._hold_values = dsp.RollingMax(int(self.n_overlaps) + 1)
+        else:
+            # n_overlaps can be modulated, keep the hold history
+            self._hold_values.resize(int(self.n_overlaps) + 1)
+        peak = self._hold_values.push(peak)
 
-        db = (20 * (math.log10(max(peak, 1e-16))))
-        scal_value = (self.db_range + db) / self.db_range
-        bar = np.zeros(self._num_pixels) * np.array([[0], [0], [0]])
+        db = dsp.amplitude_to_db(peak)
+        scal_value = 1.0 + db / self.db_range
         index = int(self._num_pixels * scal_value)
         index = np.clip(index, 0, self._num_pixels - 1)
-        bar[0:3, 0:index] = color[0:3, 0:index]
-        self._outputBuffer[0] = bar
+        self._bar[:, :index] = color[0:3, :index]
+        self._bar[:, index:] = 0.0
+        self._outputBuffer[0] = self._bar
 
 
 class MovingLight(Effect):
@@ -445,10 +465,12 @@ class MovingLight(Effect):
         super(MovingLight, self).__initstate__()
         # state
         self._pixel_state = None
+        self._pixel_scratch = None
         self._bandpass = None
         self._last_t = 0.0
         self._last_move_t = 0.0
-        self._hold_values = []
+        self._hold_values = None
+        self._quiescent = False
 
     def numInputChannels(self):
         return 2
@@ -493,8 +515,33 @@ class MovingLight(Effect):
 
     async def update(self, dt):
         await super().update(dt)
+        if self._num_pixels is None:
+            return
         if self._pixel_state is None or np.size(self._pixel_state, 1) != self._num_pixels:
-            self._pixel_state = np.zeros(self._num_pixels) * np.array([[0.0], [0.0], [0.0]])
+            self._pixel_state = np.zeros((3, self._num_pixels), dtype=np.float32)
+            self._pixel_scratch = np.zeros((3, self._num_pixels), dtype=np.float32)
+
+    def _move(self):
+        """Moves the pixels in speed and returns the number of pixels to fill in at the origin"""
+        dt_move = self._t - self._last_move_t
+        # calculate number of pixels to shift
+        shift_pixels = int(dt_move * self.speed)
+        shift_pixels = np.clip(shift_pixels, 1, self._num_pixels - 1)
+        if dt_move * self.speed <= 1:
+            return shift_pixels
+        # shift into the scratch buffer, since shifting in place copies through a temporary anyway
+        shifted = self._pixel_scratch
+        shifted[:, shift_pixels:] = self._pixel_state[:, :-shift_pixels]
+        shifted[:, 0:shift_pixels] = self._pixel_state[:, 0:1]
+        # convolve to smooth edges (same as gaussian_filter1d with sigma=0.5)
+        shifted[:, 0:2 * shift_pixels] = convolve1d(shifted[:, 0:2 * shift_pixels],
+                                                    _gaussian_kernel,
+                                                    axis=1,
+                                                    mode='reflect')
+        self._pixel_scratch = self._pixel_state
+        self._pixel_state = shifted
+        self._last_move_t = self._t
+        return shift_pixels
 
     def process(self):
         if self._inputBuffer is None or self._outputBuffer is None:
@@ -507,51 +554,51 @@ class MovingLight(Effect):
         color = self._inputBuffer[1]
         if color is None:
             # default color: all white
-            color = np.ones(self._num_pixels) * np.array([[255.0], [255.0], [255.0]])
+            color = np.full((3, self._num_pixels), 255.0, dtype=np.float32)
         # construct filter if needed
         if self._bandpass is None:
             self._bandpass = dsp.Bandpass(self.lowcut_hz, self.highcut_hz, fs, 3)
         # update bandpass
         self._bandpass.updateParams(self.lowcut_hz, self.highcut_hz, fs, 3)
-        # apply bandpass to audio
-        y = self._bandpass.filter(np.array(audio), fs)
-        # move in speed
-        dt_move = self._t - self._last_move_t
-        # calculate number of pixels to shift
-        shift_pixels = int(dt_move * self.speed)
-        shift_pixels = np.clip(shift_pixels, 1, self._num_pixels - 1)
-        if dt_move * self.speed > 1:
-            self._pixel_state[:, shift_pixels:] = self._pixel_state[:, :-shift_pixels]
-            self._pixel_state[:, 0:shift_pixels] = self._pixel_state[:, shift_pixels:shift_pixels + 1]
-            # convolve to smooth edges
-            self._pixel_state[:, 0:2 * shift_pixels] = gaussian_filter1d(self._pixel_state[:, 0:2 * shift_pixels],
-                                                                         sigma=0.5,
-                                                                         axis=1)
-            self._last_move_t = self._t
-        # dim with time
-        dt = self._t - self._last_t
-        self._last_t = self._t
-        self._pixel_state *= (1.0 - dt / self.dim_time)
-        self._pixel_state = gaussian_filter1d(self._pixel_state, sigma=0.5, axis=1)
-        self._pixel_state = gaussian_filter1d(self._pixel_state, sigma=0.5, axis=1)
-        # calculate current peak
-        peak = np.max(y) * 1.0
-        while len(self._hold_values) > 20 * self.smoothing:
-            self._hold_values.pop()
-        self._hold_values.insert(0, peak)
-        peak = np.max(self._hold_values)
+        # apply bandpass to audio and calculate current peak
+        peak = self._bandpass.peak(np.asarray(audio), fs)
+        # hold current peak
+        if self._hold_values is None:
+            self._hold_values = dsp.RollingMax(int(20 * self.smoothing) + 1)
+        else:
+            # smoothing can be modulated, keep the hold history
+            self._hold_values.resize(int(20 * self.smoothing) + 1)
+        peak = self._hold_values.push(peak)
         # apply peak filter and scale
         try:
             peak = peak**self.peak_filter
         except Exception:
             peak = peak
         peak = peak * self.peak_scale
+        if self._quiescent and peak < 1e-6:
+            # all pixels are dark and there is no new peak: nothing to move or dim
+            self._last_t = self._last_move_t = self._t
+            self._outputBuffer[0] = self._pixel_state
+            return
+        shift_pixels = self._move()
+        # dim with time and smooth (same as applying gaussian_filter1d with sigma=0.5 twice)
+        dim = 1.0 - (self._t - self._last_t) / self.dim_time
+        self._last_t = self._t
+        convolve1d(self._pixel_state,
+                   _gaussian_kernel_twice * dim,
+                   axis=1,
+                   output=self._pixel_scratch,
+                   mode='reflect')
+        self._pixel_state, self._pixel_scratch = self._pixel_scratch, self._pixel_state
         # new pixel at origin with peak
-        r, g, b = color[0, 0], color[1, 0], color[2, 0]
-        self._pixel_state[0][0:shift_pixels] = r * peak + self.highlight * peak * 255.0
-        self._pixel_state[1][0:shift_pixels] = g * peak + self.highlight * peak * 255.0
-        self._pixel_state[2][0:shift_pixels] = b * peak + self.highlight * peak * 255.0
-        self._pixel_state = np.nan_to_num(self._pixel_state).clip(0.0, 255.0)
+        highlight = self.highlight * peak * 255.0
+        self._pixel_state[:, 0:shift_pixels] = (color[:, 0] * peak + highlight)[:, np.newaxis]
+        np.nan_to_num(self._pixel_state, copy=False)
+        np.clip(self._pixel_state, 0.0, 255.0, out=self._pixel_state)
+        # below half a LED level nothing is visible anymore
+        self._quiescent = self._pixel_state.max() < 0.5
+        if self._quiescent:
+            self._pixel_state.fill(0.0)
         self._outputBuffer[0] = self._pixel_state
 
 # TODO: 2d version
@@ -586,7 +633,8 @@ class Bonfire(Effect):
 
     def __initstate__(self):
         self._bandpass = None
-        self._hold_values = []
+        self._hold_values = None
+        self._output = None
         super(Bonfire, self).__initstate__()
 
     def numInputChannels(self):
@@ -633,10 +681,12 @@ class Bonfire(Effect):
             self._outputBuffer[0] = None
             return
         if self._inputBufferValid(1):
-            pixelbuffer = np.array(self._inputBuffer[1])
+            pixelbuffer = self._inputBuffer[1]
         else:
             # default color: all white
-            pixelbuffer = np.ones(self._num_pixels) * np.array([[255.0], [255.0], [255.0]])
+            pixelbuffer = np.full((3, self._num_pixels), 255.0, dtype=np.float32)
+        if self._output is None or self._output.shape != np.shape(pixelbuffer):
+            self._output = np.zeros(np.shape(pixelbuffer), dtype=np.float32)
 
         audio = self._inputBuffer[0].audio
         fs = self._inputBuffer[0].sample_rate
@@ -646,13 +696,14 @@ class Bonfire(Effect):
             self._bandpass = dsp.Bandpass(self.lowcut_hz, self.highcut_hz, fs, 3)
         # update bandpass
         self._bandpass.updateParams(self.lowcut_hz, self.highcut_hz, fs, 3)
-        # apply bandpass to audio
-        y = self._bandpass.filter(np.array(audio), fs)
-        peak = np.max(y) * 1.0
-        while len(self._hold_values) > 20 * self.smoothing:
-            self._hold_values.pop()
-        self._hold_values.insert(0, peak)
-        peak = np.max(self._hold_values)
+        # apply bandpass to audio and calculate current peak
+        peak = self._bandpass.peak(np.asarray(audio), fs)
+        if self._hold_values is None:
+            self._hold_values = dsp.RollingMax(int(20 * self.smoothing) + 1)
+        else:
+            # smoothing can be modulated, keep the hold history
+            self._hold_values.resize(int(20 * self.smoothing) + 1)
+        peak = self._hold_values.push(peak)
         # apply peak filter and scale
         try:
             peak = peak**self.peak_filter
@@ -660,13 +711,18 @@ class Bonfire(Effect):
             peak = peak
         peak = peak * self.peak_scale
 
-        pixelbuffer[0] = sp.ndimage.interpolation.shift(pixelbuffer[0], -self.spread * peak, mode='wrap', prefilter=True)
-        pixelbuffer[2] = sp.ndimage.interpolation.shift(pixelbuffer[2], self.spread * peak, mode='wrap', prefilter=True)
-        self._outputBuffer[0] = pixelbuffer
+        dsp.shift_wrap(pixelbuffer[0], -self.spread * peak, out=self._output[0])
+        self._output[1] = pixelbuffer[1]
+        dsp.shift_wrap(pixelbuffer[2], self.spread * peak, out=self._output[2])
+        self._outputBuffer[0] = self._output
 
 
 class FallingStars(Effect):
     """Effect for creating random stars that fade over time."""
+
+    # Maximum number of simultaneously visible stars
+    max_stars = 100
+
     @staticmethod
     def getEffectDescription():
         return \
@@ -695,11 +751,16 @@ class FallingStars(Effect):
 
     def __initstate__(self):
         # state
-        self._t0Array = []
-        self._spawnArray = []
-        self._peakArray = []
+        # stars are stored in fixed-size ring buffers (one array per attribute)
+        self._t0Array = np.zeros(FallingStars.max_stars)
+        self._spawnArray = np.zeros(FallingStars.max_stars, dtype=np.int32)
+        self._peakArray = np.zeros(FallingStars.max_stars, dtype=np.float32)
         self._starCounter = 0
+        self._starIndex = 0
+        self._thicknessRange = None
         self._bandpass = None
+        self._star_out = None
+        self._output = None
         super(FallingStars, self).__initstate__()
 
     @staticmethod
@@ -746,38 +807,48 @@ class FallingStars(Effect):
         return 1
 
     def spawnStar(self, peak):
-        self._starCounter += 1
-        self._t0Array.append(self._t)
-        self._spawnArray.append(random.randint(0, self._num_pixels - self.thickness))
-        self._peakArray.append(peak)
-        if self._starCounter > 100:
-            self._starCounter -= 1
-            self._t0Array.pop(0)
-            self._spawnArray.pop(0)
-            self._peakArray.pop(0)
-
-    def allStars(self, t, dim_speed, thickness, t0, spawnSpot, peak):
-        controlArray = []
-        for i in range(0, self._starCounter):
-            oneStarArray = np.zeros(self._num_pixels)
-            for j in range(0, thickness):
-                if i < len(spawnSpot):
-                    index = spawnSpot[i] + j
-                    if index < self._num_pixels:
-                        tmp = math.exp(-(100 / dim_speed) * (self._t - t0[i])) * max(self.min_brightness, peak[i])
-                        oneStarArray[index] = tmp
-            controlArray.append(oneStarArray)
-        return controlArray
+        # overwrite the oldest star once the ring buffer is full
+        i = self._starIndex
+        self._t0Array[i] = self._t
+        self._spawnArray[i] = random.randint(0, self._num_pixels - self.thickness)
+        self._peakArray[i] = peak
+        self._starIndex = (i + 1) % FallingStars.max_stars
+        self._starCounter = min(self._starCounter + 1, FallingStars.max_stars)
 
     def starControl(self, prob, intensity):
         for i in range(int(self.max_spawns)):
             if random.random() <= prob:
                 self.spawnStar(intensity)
-        outputArray = self.allStars(self._t, self.dim_speed, self.thickness, self._t0Array, self._spawnArray, self._peakArray)
-        return np.sum(outputArray, axis=0)
+        output = self._star_out
+        output.fill(0.0)
+        n = self._starCounter
+        if n == 0:
+            return output
+        thickness = int(self.thickness)
+        if self._thicknessRange is None or len(self._thicknessRange) != thickness:
+            self._thicknessRange = np.arange(thickness)
+        # brightness of each star
+        decay_coef = -100.0 / self.dim_speed
+        amplitude = np.exp(decay_coef * (self._t - self._t0Array[:n])) * np.maximum(
+            self.min_brightness, self._peakArray[:n])
+        if np.max(amplitude) * self.peak_scale * 255.0 < 0.5:
+            # all stars faded below half a LED level, forget them
+            self._starCounter = 0
+            self._starIndex = 0
+            return output
+        # pixels covered by each star
+        index = self._spawnArray[:n, np.newaxis] + self._thicknessRange[np.newaxis, :]
+        valid = index < self._num_pixels
+        np.add.at(output, index[valid], np.broadcast_to(amplitude[:, np.newaxis], index.shape)[valid])
+        return output
 
     async def update(self, dt):
         await super().update(dt)
+        if self._num_pixels is None:
+            return
+        if self._star_out is None or len(self._star_out) != self._num_pixels:
+            self._star_out = np.zeros(self._num_pixels, dtype=np.float32)
+            self._output = np.zeros((3, self._num_pixels), dtype=np.float32)
 
     def process(self):
         def jrange(value0To1, minRange, maxRange):
@@ -797,7 +868,7 @@ class FallingStars(Effect):
         if self._inputBufferValid(1):
             color = self._inputBuffer[1]
         else:
-            color = np.ones(self._num_pixels) * np.array([[255.0], [255.0], [255.0]])
+            color = np.full((3, self._num_pixels), 255.0, dtype=np.float32)
 
         audio = self._inputBuffer[0].audio
         fs = self._inputBuffer[0].sample_rate
@@ -807,11 +878,10 @@ class FallingStars(Effect):
             self._bandpass = dsp.Bandpass(self.lowcut_hz, self.highcut_hz, fs, 3)
         # update bandpass
         self._bandpass.updateParams(self.lowcut_hz, self.highcut_hz, fs, 3)
-        # apply bandpass to audio
-        y = self._bandpass.filter(np.array(audio), fs)
+        # apply bandpass to audio and calculate current peak
+        peak = self._bandpass.peak(np.asarray(audio), fs)
 
         # adjust probability according to peak of audio
-        peak = np.max(y) * 1.0
         maxpeak = 1
         try:
             peak = peak**self.peak_filter
@@ -822,11 +892,10 @@ class FallingStars(Effect):
         prob = min(jvalue(0, maxpeak, self.probability) + peak, 1.0)
         # logger.debug("spawn start {}".format(prob))
         if self._outputBuffer is not None:
-            self._output = np.multiply(
-                color,
-                self.starControl(prob, peak)
-                * np.array([[self.peak_scale * 1.0], [self.peak_scale * 1.0], [self.peak_scale * 1.0]]))
-        self._outputBuffer[0] = self._output.clip(0.0, 255.0)
+            stars = self.starControl(prob, peak)
+            stars *= np.float32(self.peak_scale)
+            np.multiply(color, stars, out=self._output)
+        self._outputBuffer[0] = np.clip(self._output, 0.0, 255.0, out=self._output)
 
 
 class Oscilloscope(Effect):
@@ -848,6 +917,10 @@ class Oscilloscope(Effect):
         self._bandpass = None
         self._audioBuffer = None
         self._last_process_dt = 0.0
+        self._cols = None
+        self._col_range = None
+        self._output = None
+        self._default_color = None
 
     @staticmethod
     def getParameterDefinition():
@@ -891,6 +964,16 @@ class Oscilloscope(Effect):
 
     async def update(self, dt):
         await super().update(dt)
+        if self._num_pixels is None:
+            return
+        cols = int(self._num_pixels / self._num_rows)
+        if self._output is None or np.size(self._output, 1) != self._num_rows * cols:
+            self._cols = cols
+            self._col_range = np.arange(cols)
+            # output is written as flat (3, rows * cols) buffer
+            self._output = np.zeros((3, self._num_rows * cols), dtype=np.float32)
+            # default color: all white
+            self._default_color = np.full((3, cols), 255.0, dtype=np.float32)
 
     def process(self):
         if self._inputBuffer is None or self._outputBuffer is None:
@@ -912,14 +995,14 @@ class Oscilloscope(Effect):
         # logger.info("Process")
 
         # Init color input
-        cols = int(self._num_pixels / self._num_rows)
+        cols = self._cols
         if self._inputBufferValid(1):
             color = self._inputBuffer[1]
         else:
-            color = np.ones(cols) * np.array([[255], [255], [255]])
+            color = self._default_color
 
         # Init audio
-        audio = self._inputBuffer[0].audio * self.gain
+        audio = self._inputBuffer[0].audio
         fs = self._inputBuffer[0].sample_rate
 
         # construct filter if needed
@@ -928,8 +1011,8 @@ class Oscilloscope(Effect):
         # update bandpass
         self._bandpass.updateParams(self.lowcut_hz, self.highcut_hz, fs, 3)
 
-        # apply bandpass to audio
-        y = self._bandpass.filter(np.array(audio), fs)
+        # apply bandpass and gain to audio, the displayed history only needs single precision
+        y = np.multiply(self._bandpass.filter(np.asarray(audio), fs), self.gain, dtype=np.float32)
 
         # adjust number of samples to respect window_fq_hz.
         # if we have 440 samples @ 44000 Hz -> 440/44000 = 0.01 s of data -> 100 Hz
@@ -941,12 +1024,10 @@ class Oscilloscope(Effect):
         # update audio buffer
         if self._audioBuffer is None:
             self._audioBuffer = y
-        elif self._audioBuffer is not None and (len(self._audioBuffer) + len(y)) > adjusted_window * 10:
-            # audio buffer contains more samples than we need
-            self._audioBuffer = self._audioBuffer[len(y):]
-            self._audioBuffer = np.append(self._audioBuffer, y)
         else:
-            self._audioBuffer = np.append(self._audioBuffer, y)
+            # drop oldest chunk if audio buffer contains more samples than we need
+            drop = len(y) if (len(self._audioBuffer) + len(y)) > adjusted_window * 10 else 0
+            self._audioBuffer = np.concatenate((self._audioBuffer[drop:], y))
 
         y = self._audioBuffer
         adjusted_window = int(min(len(y), adjusted_window))
@@ -962,23 +1043,25 @@ class Oscilloscope(Effect):
 
         y = y[start_idx:start_idx + adjusted_window]
 
-        output = np.zeros((3, self._num_rows, cols))
-        # First downsample to half the cols
-        decimation_ratio = np.round(len(y) / (cols + 1))
-        downsampled_audio = sp.signal.decimate(y, int(decimation_ratio), ftype='fir', zero_phase=True)
-        # Then resample to the number of cols -> prevents jumping between positive and negative values
-        for i in range(0, cols):
-            if i >= len(downsampled_audio):
-                continue
-            # determine index in audio array
-            valIdx = i
-            # get value
-            val = downsampled_audio[valIdx]
-            # convert to row idx
-            rowIdx = max(0, min(int(self._num_rows / 2 + val * self._num_rows / 2), self._num_rows - 1))
-            # set value for this col
-            output[:, rowIdx, i] = color[:, i]
-        self._outputBuffer[0] = output.reshape((3, -1))
+        self._output.fill(0.0)
+        if len(y) > cols:
+            # Resample the window to the number of cols with a polyphase FIR filter
+            # -> low pass prevents jumping between positive and negative values
+            downsampled_audio = dsp.resample(y, cols, len(y))
+        else:
+            # Nothing to filter when stretching a short window, interpolate linearly
+            downsampled_audio = np.interp(self._col_range * (len(y) / cols), np.arange(len(y)), y)
+        num_cols = min(cols, len(downsampled_audio))
+        # convert values to row idx
+        half_rows = self._num_rows / 2
+        rowIdx = downsampled_audio[:num_cols]
+        rowIdx *= half_rows
+        rowIdx += half_rows
+        rowIdx = rowIdx.astype(np.intp)
+        np.clip(rowIdx, 0, self._num_rows - 1, out=rowIdx)
+        # set value for each col
+        self._output[:, rowIdx * cols + self._col_range[:num_cols]] = color[:, :num_cols]
+        self._outputBuffer[0] = self._output
         # Update timer
         self._last_process_dt = self._t
 
@@ -997,7 +1080,7 @@ class Blink(Effect):
 
     def __initstate__(self):
         super().__initstate__()
-        self._hold_values = []
+        self._hold_values = None
         self._default_color = None
 
     def numInputChannels(self):
@@ -1038,10 +1121,12 @@ class Blink(Effect):
         y = self._inputBuffer[0].audio
         rms = dsp.rms(y)
         # calculate rms over hold_time
-        while len(self._hold_values) > 20 * self.smoothing:
-            self._hold_values.pop()
-        self._hold_values.insert(0, rms)
-        rms = dsp.rms(self._hold_values)
+        if self._hold_values is None:
+            self._hold_values = dsp.RollingRms(int(20 * self.smoothing) + 1)
+        else:
+            # smoothing can be modulated, keep the hold history
+            self._hold_values.resize(int(20 * self.smoothing) + 1)
+        rms = self._hold_values.push(rms)
         db = 20 * math.log10(max(rms, 1e-16))
         scal_value = (self.db_range + db) / self.db_range
         self._outputBuffer[0] = self._inputBuffer[1] * (1 - self.amount) + self._inputBuffer[1] * scal_value * self.amount
@@ -1075,7 +1160,7 @@ class Shift(Effect):
     def __initstate__(self):
         super().__initstate__()
         self._bandpass = None
-        self._hold_values = []
+        self._hold_values = None
         self._shift_pixels = 0
         self._last_t = self._t
 
@@ -1137,15 +1222,17 @@ class Shift(Effect):
         # update bandpass
         self._bandpass.updateParams(self.lowcut_hz, self.highcut_hz, fs, 3)
         # apply bandpass to audio
-        y = self._bandpass.filter(np.array(audio), fs)
+        y = self._bandpass.filter(np.asarray(audio), fs)
 
         x = self._inputBuffer[1]
         rms = dsp.rms(y)
         # calculate rms over hold_time
-        while len(self._hold_values) > 20 * self.smoothing:
-            self._hold_values.pop()
-        self._hold_values.insert(0, rms)
-        rms = dsp.rms(self._hold_values)
+        if self._hold_values is None:
+            self._hold_values = dsp.RollingRms(int(20 * self.smoothing) + 1)
+        else:
+            # smoothing can be modulated, keep the hold history
+            self._hold_values.resize(int(20 * self.smoothing) + 1)
+        rms = self._hold_values.push(rms)
         db = 20 * math.log10(max(rms, 1e-16))
         db = max(db, -self.db_range)
 
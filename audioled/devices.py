@@ -22,7 +22,14 @@ _GAMMA_TABLE = [
     178, 180, 181, 183, 185, 186, 188, 190, 192, 193, 195, 197, 199, 200, 202, 204, 206, 207, 209, 211, 213, 215, 217, 218,
     220, 222, 224, 226, 228, 230, 232, 233, 235, 237, 239, 241, 243, 245, 247, 249, 251, 253, 255
 ]
-_GAMMA_TABLE = np.array(_GAMMA_TABLE)
+_GAMMA_TABLE = np.array(_GAMMA_TABLE, dtype=np.uint8)
+
+
+def _to_uint8(pixels, brightness):
+    """Scales pixels by brightness, clamps them to 0..255 and truncates them to uint8"""
+    scaled = np.multiply(pixels, brightness, dtype=np.float32)
+    np.clip(scaled, 0, 255, out=scaled)
+    return scaled.astype(np.uint8)
 
 
 class LEDController:
@@ -148,7 +155,7 @@ class ESP8266(LEDController):
         """
         if pixels is None:
             pixels = np.zeros((3, self.num_pixels))
-        message = (pixels * self.getBrightness()).T.clip(0, 255).astype(np.uint8).ravel().tostring()
+        message = _to_uint8(pixels, self.getBrightness()).T.tobytes()
         self._sock.sendto(message, (self._ip, self._port))
 
 
@@ -173,7 +180,7 @@ class FadeCandy(LEDController):
     def show(self, pixels):
         if pixels is None:
             pixels = np.zeros((3, self.num_pixels))
-        self.client.put_pixels((pixels * self.getBrightness()).T.clip(0, 255).astype(int).tolist())
+        self.client.put_pixels(_to_uint8(pixels, self.getBrightness()).T.tolist())
 
 
 class BlinkStick(LEDController):
@@ -197,7 +204,7 @@ class BlinkStick(LEDController):
             pixels = np.zeros((3, self.num_pixels))
         # Truncate values and cast to integer
         n_pixels = pixels.shape[1]
-        pixels = (pixels * self.getBrightness()).clip(0, 255).astype(int)
+        pixels = _to_uint8(pixels, self.getBrightness())
         pixels = _GAMMA_TABLE[pixels]
         # Read the rgb values
         r = pixels[0][:].astype(int)
@@ -302,7 +309,7 @@ class RaspberryPi(LEDController):
 
         # Truncate values and cast to integer
         n_pixels = pixels.shape[1]
-        pixels = (pixels * self.getBrightness()).clip(0, 255).astype(int)
+        pixels = _to_uint8(pixels, self.getBrightness())
         # Optional gamma correction
         pixels = _GAMMA_TABLE[pixels]
         # Encode 24-bit LED values in 32 bit integers
@@ -347,7 +354,7 @@ class DotStar(LEDController):
         if pixels is None:
             pixels = np.zeros((3, self.num_pixels))
         bgr = [2, 1, 0]
-        self.led_data[0:, 1:4] = (pixels * self.getBrightness())[bgr].T.clip(0, 255)
+        self.led_data[0:, 1:4] = _to_uint8(pixels, self.getBrightness())[bgr].T
         self._strip.show()
 
 
@@ -1,10 +1,12 @@
 from __future__ import (absolute_import, division, print_function, unicode_literals)
 
+import functools
 import itertools
 import math
+from collections import deque
 
 import numpy as np
-from scipy.signal import butter, lfilter_zi, lfilter
+from scipy.signal import butter, firwin, lfilter_zi, lfilter, resample_poly
 
 
 def rollwin(signal, n_overlaps):
@@ -130,6 +132,31 @@ def pad_zeros(signal):
     return (np.r_[chunk, zeros] for chunk in signal)
 
 
+def shift_wrap(x, shift, out):
+    """Shifts x along its last axis by a fractional number of samples with wrap-around
+
+    Same as scipy.ndimage.shift(x, shift, mode='wrap') but with linear instead of spline interpolation,
+    which boils down to two rolls of the array. The result is written into out, which must not overlap x.
+    """
+    n = x.shape[-1]
+    k = math.floor(shift)
+    frac = shift - k
+    if frac > 1.0 - 1e-3:
+        k += 1
+        frac = 0.0
+    k = int(k) % n
+    out[..., k:] = x[..., :n - k]
+    out[..., :k] = x[..., n - k:]
+    if frac < 1e-3:
+        return out
+    # linear interpolation with the neighbour one sample further away
+    k = (k + 1) % n
+    out *= 1.0 - frac
+    out[..., k:] += frac * x[..., :n - k]
+    out[..., :k] += frac * x[..., n - k:]
+    return out
+
+
 def preemphasis(signal, coeff=0.97):
     """Applies a pre-emphasis filter to the given input signal"""
     return np.append(signal[0], signal[1:] - coeff * signal[:-1])
@@ -182,21 +209,31 @@ def filter_bank(n_filters, n_fft, fs, fmin_hz, fmax_hz, scale):
 
 def warped_psd(y, bins, fs, frange, scale):
     """Returns the power spectrum mapped to a perceptual scale"""
+    return warped_psd_multi(y, bins, fs, [frange], scale)[0]
+
+
+def warped_psd_multi(y, bins, fs, franges, scale):
+    """Returns the power spectrum mapped to a perceptual scale for each frequency range
+
+    The FFT of y is only computed once and shared by all frequency ranges.
+    """
     N = len(y)
     # Transform to frequency domain
-    pow_spectrum = np.abs(np.fft.rfft(y))**2 * (2 / N)
-    # Construct triangular filter bank
-    output, f = filter_bank(bins, N, fs, frange[0], frange[1], scale)
-    # Apply filter bank to power spectrum
-    # Remark: Numpy matrix multiplication uses all available CPU cores for a rather small matrix multiplication
-    # output_np = np.dot(pow_spectrum, output.T)
-
-    # Own MM:
+    spectrum = np.fft.rfft(y)
+    pow_spectrum = (spectrum.real**2 + spectrum.imag**2) * (2 / N)
     pow_spectrum = pow_spectrum.reshape(1, -1)
-    output = np.sum(pow_spectrum[:, :, None]*output.T[None, :, :], axis=1)
-    output = output.reshape(-1)
-    # print(np.allclose(output, output_np))
-    return output
+    outputs = []
+    for frange in franges:
+        # Construct triangular filter bank
+        output, f = filter_bank(bins, N, fs, frange[0], frange[1], scale)
+        # Apply filter bank to power spectrum
+        # Remark: Numpy matrix multiplication uses all available CPU cores for a rather small matrix multiplication
+        # output_np = np.dot(pow_spectrum, output.T)
+
+        # Own MM:
+        output = np.sum(pow_spectrum[:, :, None] * output.T[None, :, :], axis=1)
+        outputs.append(output.reshape(-1))
+    return outputs
 
 
 def preprocess(audio, fs, fmax, n_overlaps):
@@ -215,13 +252,25 @@ def preprocess(audio, fs, fmax, n_overlaps):
 
 
 def rms(normalized_sample_points):
-    N = len(normalized_sample_points)
-    sum_squares = sum(s**2 for s in normalized_sample_points)
+    x = np.asarray(normalized_sample_points, dtype=np.float64)
+    N = len(x)
+    sum_squares = float(np.dot(x, x))
     # TODO: Why N/2???
     return math.sqrt(sum_squares / (N / 2))
 
 
+def amplitude_to_db(value):
+    """Returns 20 * log10(value), clipped at -320 dB"""
+    # 20 / ln(10)
+    return 8.685889638065035 * math.log(max(value, 1e-16))
+
+
+@functools.lru_cache(maxsize=64)
 def design_filter(lowcut, highcut, fs, order=3):
+    """Returns coefficients b, a and initial state zi of a butterworth bandpass
+
+    Results are cached and shared between callers, so they must not be modified in place.
+    """
     nyq = 0.5 * fs
     lowcut = max(lowcut, 10)
     highcut = min(highcut, 22000)
@@ -231,6 +280,27 @@ def design_filter(lowcut, highcut, fs, order=3):
     return b, a, lfilter_zi(b, a)
 
 
+@functools.lru_cache(maxsize=16)
+def resample_filter(up, down, dtype=np.float64):
+    """Returns the anti-aliasing FIR filter scipy.signal.resample_poly designs for the ratio up / down
+
+    The filter is cached and shared between callers, so it is read-only.
+    """
+    max_rate = max(up, down) // math.gcd(up, down)
+    h = firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=('kaiser', 5.0)).astype(dtype)
+    h.setflags(write=False)
+    return h
+
+
+def resample(x, up, down):
+    """Resamples x by up / down like scipy.signal.resample_poly, but without redesigning the filter each call
+
+    The filter has the same precision as x, so float32 input is resampled in float32.
+    """
+    x = np.asarray(x)
+    return resample_poly(x, up, down, window=resample_filter(up, down, x.dtype))
+
+
 class Bandpass():
     def __init__(self, lowcut, highcut, fs, order=3):
         self._fs = fs
@@ -248,6 +318,10 @@ class Bandpass():
         y, self._filter_zi = lfilter(b=self._filter_b, a=self._filter_a, x=audio, zi=self._filter_zi)
         return y
 
+    def peak(self, audio, fs):
+        """Filters audio and returns the non-negative peak value of the filtered signal as float"""
+        return max(float(self.filter(audio, fs).max()), 0.0)
+
     def updateParams(self, lowcut, highcut, fs, order):
         if self._lowcut != lowcut or self._highcut != highcut or self._fs != fs or self._order != order:
             self._lowcut = lowcut
@@ -257,4 +331,77 @@ class Bandpass():
             self._initFilter()
 
     def _initFilter(self):
-        self._filter_b, self._filter_a, self._filter_zi = design_filter(self._lowcut, self._highcut, self._fs, self._order)
+        self._filter_b, self._filter_a, filter_zi = design_filter(self._lowcut, self._highcut, self._fs, self._order)
+        # filter state is per instance
+        self._filter_zi = filter_zi.copy()
+
+
+class RollingRms():
+    """Keeps the last n values in a ring buffer and updates their rms with every new value
+
+    The running sum of squares is rebuilt from the buffer whenever the buffer wraps around,
+    so rounding errors do not add up, and is exactly zero while all values are zero.
+    """
+    def __init__(self, n):
+        self.size = n
+        self._values = np.zeros(n)
+        self._index = 0
+        self._count = 0
+        self._nonzero = 0
+        self._sum_squares = 0.0
+
+    def push(self, value):
+        """Adds value and returns the rms (see rms()) over the last n values"""
+        oldest = self._values[self._index]
+        self._values[self._index] = value
+        self._index = (self._index + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+        self._nonzero += int(value != 0.0) - int(oldest != 0.0)
+        if self._nonzero == 0:
+            self._sum_squares = 0.0
+        elif self._index == 0:
+            self._sum_squares = float(np.dot(self._values, self._values))
+        else:
+            self._sum_squares = max(self._sum_squares + value * value - oldest * oldest, 0.0)
+        return math.sqrt(self._sum_squares / (self._count / 2))
+
+    def resize(self, n):
+        """Changes the window to the last n values, the most recent values are kept"""
+        if n == self.size:
+            return
+        count = min(self._count, n)
+        # values in order from oldest to newest
+        recent = np.roll(self._values, -self._index)[self.size - count:]
+        self.size = n
+        self._values = np.zeros(n)
+        self._values[:count] = recent
+        self._index = count % n
+        self._count = count
+        self._nonzero = int(np.count_nonzero(recent))
+        self._sum_squares = float(np.dot(recent, recent))
+
+
+class RollingMax():
+    """Keeps track of the maximum of the last n values
+
+    Uses a monotonic queue, so each new value costs O(1) amortized.
+    """
+    def __init__(self, n):
+        self.size = n
+        self._count = 0
+        self._candidates = deque()  # (index, value) with decreasing values
+
+    def push(self, value):
+        """Adds value and returns the maximum over the last n values"""
+        while self._candidates and self._candidates[-1][1] <= value:
+            self._candidates.pop()
+        self._candidates.append((self._count, value))
+        # more than one value can expire after the window got smaller
+        while self._candidates[0][0] <= self._count - self.size:
+            self._candidates.popleft()
+        self._count += 1
+        return self._candidates[0][1]
+
+    def resize(self, n):
+        """Changes the window to the last n values, the most recent values are kept"""
+        self.size = n
@@ -1,5 +1,6 @@
 from __future__ import (absolute_import, division, print_function, unicode_literals)
 
+import functools
 import math
 import random
 from collections import OrderedDict
@@ -30,6 +31,75 @@ waveshape_neg = ['-sin(x)', '-1/x', '-1/x**2', '-1/x**3', '-const(x)', '-x', '-x
 waveshape_default = 'sin(x)'
 
 
+@functools.lru_cache(maxsize=8)
+def _default_color(num_pixels, rgb=(255.0, 255.0, 255.0)):
+    """Returns a read-only (3, num_pixels) view of a single color without allocating a full buffer."""
+    return np.broadcast_to(np.array(rgb, dtype=np.float32)[:, np.newaxis], (3, num_pixels))
+
+
+def _spline_coefficients(arrays):
+    """Returns the cubic B-spline coefficients of every row of a 2-D array for _spline_shift_wrap."""
+    return sp.ndimage.spline_filter1d(arrays, order=3, axis=1, output=arrays.dtype, mode='grid-wrap')
+
+
+def _spline_shift_wrap(coefficients, shifts):
+    """Shifts every row by a fractional number of pixels with wrap-around (cubic spline interpolation).
+
+    Same as ndimage.shift(order=3, mode='grid-wrap') on the original rows, but takes the spline
+    coefficients from _spline_coefficients, so the prefilter only runs once for rows that do not change.
+    """
+    num_pixels = coefficients.shape[1]
+    shift_int = np.floor(shifts)
+    frac = (shifts - shift_int).astype(coefficients.dtype)[:, np.newaxis]
+    frac_inv = 1.0 - frac
+    # roll every row by its whole pixels, negative indices wrap around
+    pixel_idx = np.arange(num_pixels) - (shift_int.astype(int) % num_pixels)[:, np.newaxis]
+    c = np.take_along_axis(coefficients, pixel_idx, axis=1)
+    # pixel i is interpolated from the rolled coefficients i - 2 up to i + 1
+    c = np.take(c, np.arange(-2, num_pixels + 1), axis=1, mode='wrap')
+    return (frac**3 / 6.0 * c[:, :num_pixels] + (2.0 / 3.0 - frac_inv**2 + frac_inv**3 / 2.0) * c[:, 1:num_pixels + 1]
+            + (2.0 / 3.0 - frac**2 + frac**3 / 2.0) * c[:, 2:num_pixels + 2] + frac_inv**3 / 6.0 * c[:, 3:])
+
+
+def _shift_wrap_sum(arrays, shifts, weights):
+    """Shifts every row of a 2-D array by a fractional number of pixels with wrap-around (linear interpolation)
+    and returns the weighted sum of all rows."""
+    num_pixels = arrays.shape[1]
+    shift_int = np.floor(shifts)
+    shift_frac = shifts - shift_int
+    pixel_idx = (np.arange(num_pixels) - shift_int.astype(int)[:, np.newaxis]) % num_pixels
+    shifted = np.take_along_axis(arrays, pixel_idx, axis=1)
+    # Weight and sum up the rows for both neighbours in one matrix product,
+    # the right neighbour of every pixel is the same sum moved by one pixel
+    left, right = np.dot(np.array([weights * (1.0 - shift_frac), weights * shift_frac], dtype=arrays.dtype), shifted)
+    return left + np.roll(right, 1)
+
+
+def _sort_key_red(pixels):
+    return pixels[:, 0]
+
+
+def _sort_key_green(pixels):
+    return pixels[:, 1]
+
+
+def _sort_key_blue(pixels):
+    return pixels[:, 2]
+
+
+def _sort_key_brightness(pixels):
+    return pixels[:, 0] + pixels[:, 1].astype(np.uint16) + pixels[:, 2]
+
+
+# Sort key for each value of sortby, maps the (N, 4) uint8 pixels of Sorting to one value per pixel
+sortby_key = {
+    'red': _sort_key_red,
+    'green': _sort_key_green,
+    'blue': _sort_key_blue,
+    'brightness': _sort_key_brightness,
+}
+
+
 class SwimmingPool(Effect):
     """Generates a wave effect to look like the reflection on the bottom of a swimming pool."""
 
@@ -140,26 +210,28 @@ class SwimmingPool(Effect):
     def _createWaveform(self, spread, wave_hight, speed, wave_form):
         # Added negatives. Flip will happen later. This is just to get the form.
         # Symmetricals are for integrity and for selection in all negatives.
-        if wave_form == 'sin(x)' or wave_form == '-sin(x)':
-            return np.asarray(sp.ndimage.gaussian_filter([0, 0] + [math.sin(math.pi / spread * i) * wave_hight for i in range(1, spread + 1)] + [0, 0], sigma=3))
-        elif wave_form == '1/x' or wave_form == '-1/x':
-            return np.asarray(sp.ndimage.gaussian_filter([0, 0] + [spread / 2 / i * wave_hight for i in range(1, spread + 1)] + [0, 0], sigma=3))
-        elif wave_form == '1/x**2' or wave_form == '-1/x**2':
-            return np.asarray(sp.ndimage.gaussian_filter([0, 0] + [spread / 2 / i**2 * wave_hight for i in range(1, spread + 1)] + [0, 0], sigma=3))
-        elif wave_form == '1/x**3' or wave_form == '-1/x**3':
-            return np.asarray(sp.ndimage.gaussian_filter([0, 0] + [spread / 2 / i**3 * wave_hight for i in range(1, spread + 1)] + [0, 0], sigma=3))
-        elif wave_form == 'const(x)' or wave_form == '-const(x)':
-            return np.asarray(sp.ndimage.gaussian_filter([0, 0] + [wave_hight for i in range(1, spread + 1)] + [0, 0], sigma=3))
-        elif wave_form == 'x' or wave_form == '-x':
-            return np.asarray(sp.ndimage.gaussian_filter([0, 0] + [i * wave_hight / spread for i in range(1, spread + 1)] + [0, 0], sigma=3))
-        elif wave_form == 'x**2' or wave_form == '-x**2':
-            return np.asarray(sp.ndimage.gaussian_filter([0, 0] + [i**2 * wave_hight / spread / 10 for i in range(1, spread + 1)] + [0, 0], sigma=3))
-        elif wave_form == 'x**3' or wave_form == '-x**3':
-            return np.asarray(sp.ndimage.gaussian_filter([0, 0] + [i**3 * wave_hight / spread / 100 for i in range(1, spread + 1)] + [0, 0], sigma=3))
-        elif wave_form == 'x * e**(-x)' or wave_form == '-x * e**(-x)':
-            return np.asarray(sp.ndimage.gaussian_filter([0, 0] + [(0.5 / spread) * i * math.exp(-(0.2 / spread) * i) * wave_hight for i in range(1, spread + 1)] + [0, 0], sigma=3))
-        # Default
-        return np.asarray(sp.ndimage.gaussian_filter([0, 0] + [math.sin(math.pi / spread * i) * wave_hight for i in range(1, spread + 1)] + [0, 0], sigma=3))
+        x = np.arange(1, spread + 1, dtype=float)
+        wave_form = wave_form.lstrip('-')
+        if wave_form == '1/x':
+            wave = spread / 2 / x * wave_hight
+        elif wave_form == '1/x**2':
+            wave = spread / 2 / x**2 * wave_hight
+        elif wave_form == '1/x**3':
+            wave = spread / 2 / x**3 * wave_hight
+        elif wave_form == 'const(x)':
+            wave = np.full(len(x), wave_hight, dtype=float)
+        elif wave_form == 'x':
+            wave = x * wave_hight / spread
+        elif wave_form == 'x**2':
+            wave = x**2 * wave_hight / spread / 10
+        elif wave_form == 'x**3':
+            wave = x**3 * wave_hight / spread / 100
+        elif wave_form == 'x * e**(-x)':
+            wave = (0.5 / spread) * x * np.exp(-(0.2 / spread) * x) * wave_hight
+        else:
+            # Default: sin(x)
+            wave = np.sin(math.pi / spread * x) * wave_hight
+        return sp.ndimage.gaussian_filter(np.pad(wave, 2), sigma=3)
 
     def _createWave(self, _spread, _wavehight, _speed):
         # Create array for a single wave
@@ -182,7 +254,7 @@ class SwimmingPool(Effect):
         _output[:len(_CArray)] = _CArray
         # Move somewhere
         _output = np.roll(_output, np.random.randint(0, self._num_pixels), axis=0)
-        return _output.clip(0.0, 255.0)
+        return _output.clip(0.0, 255.0, out=_output)
 
     def _initWaves(self, num_waves, wavespread_low=50, wavespread_high=100, max_speed=30):
         wavespread_low = int(wavespread_low)
@@ -195,7 +267,8 @@ class SwimmingPool(Effect):
         _WaveArraySpecHeight = np.random.rand(num_waves)
         for i in range(0, num_waves):
             _WaveArray.append(self._createWave(_wavespread[i], _WaveArraySpecHeight[i], _WaveArraySpecSpeed[i]))
-        return _WaveArray, _WaveArraySpecSpeed
+        # One row per wave
+        return np.array(_WaveArray, dtype=np.float32).reshape(num_waves, self._num_pixels), _WaveArraySpecSpeed
 
     def numInputChannels(self):
         return 1
@@ -207,8 +280,8 @@ class SwimmingPool(Effect):
         await super().update(dt)
         if self._num_pixels is None:
             return
-        if self._pixel_state is None or np.size(self._pixel_state, 1) != self._num_pixels:
-            self._pixel_state = np.zeros(self._num_pixels) * np.array([[0.0], [0.0], [0.0]])
+        if self._pixel_state is None or self._pixel_state.shape[1] != self._num_pixels:
+            self._pixel_state = np.zeros((3, self._num_pixels), dtype=np.float32)
             self._Wave = None
             self._WaveSpecSpeed = None
 
@@ -242,28 +315,22 @@ class SwimmingPool(Effect):
         if self._inputBuffer is None or self._outputBuffer is None:
             return
         if not self._inputBufferValid(0):
-            color = np.ones(self._num_pixels) * np.array([[255], [255], [255]])
+            color = _default_color(self._num_pixels)
         else:
             color = self._inputBuffer[0]
 
-        all_waves = np.zeros(self._num_pixels)
-        for i in range(0, int(self.num_waves)):
-            fact = 1.0
-            if i == 0:
-                fact = (self._rotate_counter / 30)
-            if i == self.num_waves - 1:
-                fact = (1.0 - self._rotate_counter / 30)
-            if i < len(self._Wave) and i < len(self._WaveSpecSpeed):
-                
-                step = sp.ndimage.interpolation.shift(
-                    self._Wave[i],
-                    self._t * self._WaveSpecSpeed[i],
-                    mode='wrap',
-                    prefilter=True) * self.scale * fact
-                # step = np.roll(self._Wave[i], int(self._t * self._WaveSpecSpeed[i]), axis=0) * self.scale * fact
-                all_waves += step
-
-        self._outputBuffer[0] = np.multiply(color, all_waves).clip(0, 255.0)
+        num_waves = min(int(self.num_waves), len(self._Wave), len(self._WaveSpecSpeed))
+        wave_idx = np.arange(num_waves)
+        # Fade in the newest and fade out the oldest wave
+        fact = np.ones(num_waves)
+        fact[wave_idx == 0] = self._rotate_counter / 30
+        fact[wave_idx == self.num_waves - 1] = 1.0 - self._rotate_counter / 30
+        # Move all waves at once
+        all_waves = _shift_wrap_sum(self._Wave[:num_waves], self._t * self._WaveSpecSpeed[:num_waves], fact * self.scale)
+
+        np.multiply(color, all_waves, out=self._pixel_state)
+        self._pixel_state.clip(0, 255.0, out=self._pixel_state)
+        self._outputBuffer[0] = self._pixel_state
 
 
 class DefenceMode(Effect):
@@ -281,6 +348,7 @@ class DefenceMode(Effect):
 
     def __initstate__(self):
         # state
+        self._output = None
         super(DefenceMode, self).__initstate__()
 
     def numInputChannels(self):
@@ -289,17 +357,23 @@ class DefenceMode(Effect):
     def numOutputChannels(self):
         return 1
 
+    async def update(self, dt):
+        await super().update(dt)
+        if self._num_pixels is None:
+            return
+        if self._output is None or self._output.shape[1] != self._num_pixels:
+            self._output = np.zeros((3, self._num_pixels), dtype=np.float32)
+
     def process(self):
         if self._outputBuffer is not None:
             # color = self._inputBuffer[0]
             A = random.choice([True, False, False])
             if A is True:
-                self._output = np.ones(self._num_pixels) * np.array([[random.randint(
-                    0.0, 255.0)], [random.randint(0.0, 255.0)], [random.randint(0.0, 255.0)]])
+                self._output[:] = np.random.randint(0, 256, size=(3, 1))
             else:
-                self._output = np.zeros(self._num_pixels) * np.array([[0.0], [0.0], [0.0]])
+                self._output.fill(0.0)
 
-            self._outputBuffer[0] = self._output.clip(0.0, 255.0)
+            self._outputBuffer[0] = self._output
 
 
 class MidiKeyboard(Effect):
@@ -309,14 +383,8 @@ class MidiKeyboard(Effect):
         return \
             "Effect for handling midi inputs."
 
-    class Note(object):
-        def __init__(self, note, velocity, spawn_time):
-            self.note = note
-            self.velocity = velocity
-            self.spawn_time = spawn_time
-            self.active = True
-            self.value = 0.0
-            self.release_time = 0.0
+    # Number of midi note numbers, every note number has its own slot
+    num_notes = 128
 
     def __init__(self, midiPort='', attack=0.0, decay=0.0, sustain=1.0, release=0.0):
 
@@ -346,7 +414,19 @@ class MidiKeyboard(Effect):
             self.midiPort = self._midi.name
             logger.info("Not connected midi device {}".format(self.midiPort))
             logger.error(e)
-        self._on_notes = []
+        # notes are stored as parallel arrays indexed by note number
+        self._velocity = np.zeros(MidiKeyboard.num_notes)
+        self._spawn_time = np.zeros(MidiKeyboard.num_notes)
+        # order in which the notes were pressed, decides which note is drawn if notes share a pixel
+        self._spawn_order = np.zeros(MidiKeyboard.num_notes, dtype=np.int64)
+        self._spawn_count = 0
+        self._release_time = np.zeros(MidiKeyboard.num_notes)
+        # key is pressed
+        self._active = np.zeros(MidiKeyboard.num_notes, dtype=bool)
+        # key is pressed or in release phase
+        self._sounding = np.zeros(MidiKeyboard.num_notes, dtype=bool)
+        self._value = np.zeros(MidiKeyboard.num_notes)
+        self._output = None
 
     def numInputChannels(self):
         return 1  # color
@@ -407,55 +487,60 @@ class MidiKeyboard(Effect):
 
     async def update(self, dt):
         await super().update(dt)
+        if self._num_pixels is not None:
+            if self._output is None or self._output.shape[1] != self._num_pixels:
+                self._output = np.zeros((3, self._num_pixels), dtype=np.float32)
         # Process midi notes
         for msg in self._midi.iter_pending():
             if msg.type == 'note_on':
-                self._on_notes.append(MidiKeyboard.Note(msg.note, msg.velocity, self._t))
+                self._velocity[msg.note] = msg.velocity
+                self._spawn_time[msg.note] = self._t
+                self._spawn_order[msg.note] = self._spawn_count
+                self._spawn_count += 1
+                self._active[msg.note] = True
+                self._sounding[msg.note] = True
             if msg.type == 'note_off':
-                toRemove = [note for note in self._on_notes if note.note == msg.note]
-                for note in toRemove:
-                    note.active = False
-                    note.release_time = self._t
+                self._active[msg.note] = False
+                self._release_time[msg.note] = self._t
 
         # Process note states
-        for note in self._on_notes:
-            if note.active:
-
-                if self._t - note.spawn_time < self.attack:
-                    # attack phase
-                    note.value = note.velocity * (self._t - note.spawn_time) / self.attack
-                elif self._t - note.spawn_time < self.attack + self.decay:
-                    # decay phase
-                    # time since attack phase ended: self._t - note.spawn_time - self.attack
-                    decay_fact = 1.0 - (self._t - note.spawn_time - self.attack) / self.decay
-                    # linear interpolation
-                    # decay_fact = 0.0: decay beginning -> 1.0
-                    # decay_fact = 1.0: decay ending -> sustain
-                    note.value = note.velocity * (self.sustain + (1.0 - self.sustain) * decay_fact)
-                else:
-                    # sustain phase
-                    note.value = note.velocity * self.sustain
-            else:
-                # release phase
-                if self._t - note.release_time < self.release:
-                    note.value = note.velocity * (1.0 - (self._t - note.release_time) / self.release) * self.sustain
-                else:
-                    self._on_notes.remove(note)
+        # silence notes whose release phase is over
+        self._sounding &= self._active | (self._t - self._release_time < self.release)
+        age = self._t - self._spawn_time
+        # sustain phase
+        value = self._velocity * self.sustain
+        # attack phase
+        attack = self._active & (age < self.attack)
+        value[attack] = self._velocity[attack] * age[attack] / self.attack
+        # decay phase
+        decay = self._active & ~attack & (age < self.attack + self.decay)
+        # linear interpolation
+        # decay_fact = 0.0: decay beginning -> 1.0
+        # decay_fact = 1.0: decay ending -> sustain
+        decay_fact = 1.0 - (age[decay] - self.attack) / self.decay
+        value[decay] = self._velocity[decay] * (self.sustain + (1.0 - self.sustain) * decay_fact)
+        # release phase
+        release = self._sounding & ~self._active
+        value[release] *= 1.0 - (self._t - self._release_time[release]) / self.release
+        self._value = value
 
     def process(self):
         if self._inputBuffer is None or self._outputBuffer is None:
             return
         if not self._inputBufferValid(0):
-            col = np.ones(self._num_pixels) * np.array([[255], [255], [255]])
+            col = _default_color(self._num_pixels)
         else:
             col = self._inputBuffer[0]
 
         # Draw
-        pos = np.zeros(self._num_pixels)
-        for note in self._on_notes:
-            index = int(max(0, min(self._num_pixels - 1, float(note.note) / 127.0 * self._num_pixels)))
-            pos[index] = 1 * note.value / 127.0
-        self._outputBuffer[0] = np.multiply(pos, col)
+        pos = np.zeros(self._num_pixels, dtype=np.float32)
+        notes = np.flatnonzero(self._sounding)
+        notes = notes[np.argsort(self._spawn_order[notes])]
+        index = np.clip(notes / 127.0 * self._num_pixels, 0, self._num_pixels - 1).astype(int)
+        # the most recently pressed note wins if several notes map to the same pixel
+        index, last = np.unique(index[::-1], return_index=True)
+        pos[index] = self._value[notes[::-1][last]] / 127.0
+        self._outputBuffer[0] = np.multiply(pos, col, out=self._output)
 
 
 class Breathing(Effect):
@@ -471,6 +556,7 @@ class Breathing(Effect):
 
     def __initstate__(self):
         # state
+        self._output = None
         super(Breathing, self).__initstate__()
 
     def numInputChannels(self):
@@ -502,16 +588,24 @@ class Breathing(Effect):
         }
         return help
 
+    async def update(self, dt):
+        await super().update(dt)
+        if self._num_pixels is None:
+            return
+        if self._output is None or self._output.shape[1] != self._num_pixels:
+            self._output = np.zeros((3, self._num_pixels), dtype=np.float32)
+
     def process(self):
         if self._inputBuffer is None or self._outputBuffer is None:
             return
         color = self._inputBuffer[0]
         if color is None:
-            color = np.ones(self._num_pixels) * np.array([[255.0], [255.0], [255.0]])
+            color = _default_color(self._num_pixels)
         if self._outputBuffer is not None:
             brightness = self.oneStar(self._t, self.cycle)
-            self._output = np.multiply(color, np.ones(self._num_pixels) * np.array([[brightness], [brightness], [brightness]]))
-        self._outputBuffer[0] = self._output.clip(0.0, 255.0)
+            np.multiply(color, brightness, out=self._output)
+        self._output.clip(0.0, 255.0, out=self._output)
+        self._outputBuffer[0] = self._output
 
 
 class Heartbeat(Effect):
@@ -527,6 +621,7 @@ class Heartbeat(Effect):
 
     def __initstate__(self):
         # state
+        self._output = None
         super(Heartbeat, self).__initstate__()
 
     def numInputChannels(self):
@@ -558,17 +653,25 @@ class Heartbeat(Effect):
         }
         return help
 
+    async def update(self, dt):
+        await super().update(dt)
+        if self._num_pixels is None:
+            return
+        if self._output is None or self._output.shape[1] != self._num_pixels:
+            self._output = np.zeros((3, self._num_pixels), dtype=np.float32)
+
     def process(self):
         if self._inputBuffer is None or self._outputBuffer is None:
             return
         if not self._inputBufferValid(0):
-            color = np.ones(self._num_pixels) * np.array([[255.0], [0.0], [0.0]])
+            color = _default_color(self._num_pixels, (255.0, 0.0, 0.0))
         else:
             color = self._inputBuffer[0]
 
         brightness = self.oneStar(self._t, self.speed)
-        self._output = np.multiply(color, np.ones(self._num_pixels) * np.array([[brightness], [brightness], [brightness]]))
-        self._outputBuffer[0] = self._output.clip(0.0, 255.0)
+        np.multiply(color, brightness, out=self._output)
+        self._output.clip(0.0, 255.0, out=self._output)
+        self._outputBuffer[0] = self._output
 
 
 class FallingStars(Effect):
@@ -578,6 +681,9 @@ class FallingStars(Effect):
         return \
             "Effect for creating random stars that fade over time."
 
+    # Maximum number of simultaneously visible stars
+    max_stars = 100
+
     def __init__(self, dim_speed=100, thickness=1, spawntime=0.1, max_brightness=1, probability=0.1, max_spawns=1):
         self.dim_speed = dim_speed
         self.thickness = thickness
@@ -588,11 +694,14 @@ class FallingStars(Effect):
 
     def __initstate__(self):
         # state
-        self._t0Array = []
-        self._spawnArray = []
+        # stars are stored in fixed-size ring buffers (one array per attribute)
+        self._t0Array = np.zeros(FallingStars.max_stars)
+        self._spawnArray = np.zeros(FallingStars.max_stars, dtype=np.int32)
         self._starCounter = 0
+        self._starIndex = 0
         self._spawnflag = True
         self._lastSpawn = 0
+        self._output = None
         super(FallingStars, self).__initstate__()
 
     @staticmethod
@@ -630,50 +739,53 @@ class FallingStars(Effect):
         return 1
 
     def spawnStar(self):
-        self._starCounter += 1
-        self._t0Array.append(self._t)
-        self._spawnArray.append(random.randint(0, self._num_pixels - self.thickness))
-        if self._starCounter > 100:
-            self._starCounter -= 1
-            self._t0Array.pop(0)
-            self._spawnArray.pop(0)
+        # overwrite the oldest star once the ring buffer is full
+        i = self._starIndex
+        self._t0Array[i] = self._t
+        self._spawnArray[i] = random.randint(0, self._num_pixels - self.thickness)
+        self._starIndex = (i + 1) % FallingStars.max_stars
+        self._starCounter = min(self._starCounter + 1, FallingStars.max_stars)
 
     def allStars(self, t, dim_speed, thickness, t0, spawnSpot):
-        controlArray = []
-        for i in range(0, self._starCounter):
-            oneStarArray = np.zeros(self._num_pixels)
-            for j in range(0, thickness):
-                if i < len(spawnSpot):
-                    index = spawnSpot[i] + j
-                    if index < self._num_pixels:
-                        oneStarArray[index] = math.exp(-(100 / dim_speed) * (self._t - t0[i]))
-            controlArray.append(oneStarArray)
-        return controlArray
+        n = self._starCounter
+        if n == 0:
+            return np.zeros(self._num_pixels)
+        # brightness of each star
+        brightness = np.exp(-(100 / dim_speed) * (t - t0[:n]))
+        # brightness at the first pixel of each star
+        stars = np.bincount(spawnSpot[:n], weights=brightness, minlength=self._num_pixels)[:self._num_pixels]
+        thickness = int(thickness)
+        if thickness > 1:
+            # spread each star over thickness pixels (moving sum over the running total)
+            stars = np.cumsum(stars)
+            stars[thickness:] -= stars[:-thickness].copy()
+        return stars
 
     def starControl(self, prob):
         for _ in range(int(self.max_spawns)):
             if random.random() <= prob:
                 self.spawnStar()
-        outputArray = self.allStars(self._t, self.dim_speed, self.thickness, self._t0Array, self._spawnArray)
-        return np.sum(outputArray, axis=0)
+        return self.allStars(self._t, self.dim_speed, self.thickness, self._t0Array, self._spawnArray)
 
     async def update(self, dt):
         await super().update(dt)
+        if self._num_pixels is None:
+            return
+        if self._output is None or self._output.shape[1] != self._num_pixels:
+            self._output = np.zeros((3, self._num_pixels), dtype=np.float32)
 
     def process(self):
         if self._inputBuffer is None or self._outputBuffer is None:
             return
         color = self._inputBuffer[0]
         if color is None:
-            color = np.ones(self._num_pixels) * np.array([[255.0], [255.0], [255.0]])
+            color = _default_color(self._num_pixels)
         if self._outputBuffer is not None:
 
-            self._output = np.multiply(
-                color,
-                self.starControl(self.probability)
-                * np.array([[self.max_brightness * 1.0], [self.max_brightness * 1.0], [self.max_brightness * 1.0]]))
+            np.multiply(color, self.starControl(self.probability) * self.max_brightness, out=self._output)
 
-        self._outputBuffer[0] = self._output.clip(0.0, 255.0)
+        self._output.clip(0.0, 255.0, out=self._output)
+        self._outputBuffer[0] = self._output
 
 
 class Pendulum(Effect):
@@ -695,6 +807,9 @@ class Pendulum(Effect):
 
     def __initstate__(self):
         # state
+        self._blob = None
+        self._blobKey = None
+        self._output = None
         super(Pendulum, self).__initstate__()
 
     def __setstate__(self, state):
@@ -741,24 +856,25 @@ class Pendulum(Effect):
         return help
 
     def createBlob(self, spread_rel, location_rel):
-        blobArray = np.zeros(self._num_pixels)
+        blobArray = np.zeros(self._num_pixels, dtype=np.float32)
         spread = max(int(spread_rel * self._num_pixels), 1)
         location = int(location_rel * self._num_pixels)
-        for i in range(-spread, spread + 1):
-            if (location + i) >= 0 and (location + i) < self._num_pixels:
-                blobArray[location + i] = math.cos((math.pi / spread) * i)
-        return blobArray.clip(0.0, 255.0)
+        i = np.arange(max(-spread, -location), min(spread, self._num_pixels - 1 - location) + 1)
+        blobArray[location + i] = np.cos((math.pi / spread) * i)
+        return blobArray.clip(0.0, 255.0, out=blobArray)
 
     def moveBlob(self, blobArray, displacement_rel, swingspeed):
+        # blobArray holds the spline coefficients of the blob
         displacement = displacement_rel * self._num_pixels
-        outputArray = sp.ndimage.interpolation.shift(blobArray,
-                                                     displacement * math.sin(self._t * swingspeed),
-                                                     mode='wrap',
-                                                     prefilter=True)
-        return outputArray
+        return _spline_shift_wrap(blobArray[np.newaxis], np.array([displacement * math.sin(self._t * swingspeed)]))[0]
 
     def controlBlobs(self):
-        output = self.moveBlob(self.createBlob(self.spread, self.location), self.displacement, self.swingspeed)
+        # the blob only changes with its parameters, not over time, so its spline coefficients are kept
+        blobKey = (self._num_pixels, self.spread, self.location)
+        if self._blobKey != blobKey:
+            self._blob = _spline_coefficients(self.createBlob(self.spread, self.location)[np.newaxis])[0]
+            self._blobKey = blobKey
+        output = self.moveBlob(self._blob, self.displacement, self.swingspeed)
         return output
 
     def numInputChannels(self):
@@ -767,6 +883,13 @@ class Pendulum(Effect):
     def numOutputChannels(self):
         return 1
 
+    async def update(self, dt):
+        await super().update(dt)
+        if self._num_pixels is None:
+            return
+        if self._output is None or self._output.shape[1] != self._num_pixels:
+            self._output = np.zeros((3, self._num_pixels), dtype=np.float32)
+
     def process(self):
         if self._inputBuffer is None or self._outputBuffer is None:
             return
@@ -774,17 +897,18 @@ class Pendulum(Effect):
             color = self._inputBuffer[0]
         else:
             # default: all white
-            color = np.ones(self._num_pixels) * np.array([[255.0], [255.0], [255.0]])
+            color = _default_color(self._num_pixels)
         if self.heightactivator is True:
             if self.lightflip is True:
                 lightconfig = -1.0
             else:
                 lightconfig = 1.0
-            configArray = lightconfig * math.cos(2 * self._t) * np.array([[1.0], [1.0], [1.0]])
+            brightness = lightconfig * math.cos(2 * self._t)
         else:
-            configArray = np.array([[1.0], [1.0], [1.0]])
-        self._output = np.multiply(color, self.controlBlobs() * configArray)
-        self._outputBuffer[0] = self._output.clip(0.0, 255.0)
+            brightness = 1.0
+        np.multiply(color, self.controlBlobs() * brightness, out=self._output)
+        self._output.clip(0.0, 255.0, out=self._output)
+        self._outputBuffer[0] = self._output
 
 
 class RandomPendulums(Effect):
@@ -809,6 +933,8 @@ class RandomPendulums(Effect):
         self._lightflip = []
         self._offset = []
         self._swingspeed = []
+        self._blobs = None
+        self._output = None
 
     @staticmethod
     def getParameterDefinition():
@@ -833,22 +959,12 @@ class RandomPendulums(Effect):
         return help
 
     def createBlob(self, spread_rel, location_rel):
-        blobArray = np.zeros(self._num_pixels)
+        blobArray = np.zeros(self._num_pixels, dtype=np.float32)
         spread = max(int(spread_rel * self._num_pixels), 1)
         location = int(location_rel * self._num_pixels)
-        for i in range(-spread, spread + 1):
-            if (location + i) >= 0 and (location + i) < self._num_pixels:
-                blobArray[location + i] = math.cos((math.pi / spread) * i)
-        return blobArray.clip(0.0, 255.0)
-
-    def moveBlob(self, blobArray, displacement_rel, offset_rel, swingspeed):
-        config = displacement_rel * self._num_pixels * math.sin((self._t * swingspeed) + offset_rel * self._num_pixels)
-        outputArray = sp.ndimage.interpolation.shift(blobArray, config, mode='wrap', prefilter=True)
-        return outputArray.clip(0.0, 255.0)
-
-    def controlBlobs(self, spread_rel, location_rel, displacement_rel, offset_rel, swingspeed):
-        output = self.moveBlob(self.createBlob(spread_rel, location_rel), displacement_rel, offset_rel, swingspeed)
-        return output
+        i = np.arange(max(-spread, -location), min(spread, self._num_pixels - 1 - location) + 1)
+        blobArray[location + i] = np.cos((math.pi / spread) * i)
+        return blobArray.clip(0.0, 255.0, out=blobArray)
 
     def numInputChannels(self):
         return 1
@@ -861,22 +977,25 @@ class RandomPendulums(Effect):
         if self._num_pixels is None:
             return
         if len(self._spread) == 0 or len(self._spread) != self.num_pendulums:
-            self._spread = []
-            self._location = []
-            self._displacement = []
-            self._heightactivator = []
-            self._lightflip = []
-            self._offset = []
-            self._swingspeed = []
+            pendulums = []
             for _ in range(self.num_pendulums):
                 rSpread = int(random.randint(2, 10) / 300 * self._num_pixels)
-                self._spread.append(rSpread / 300)
-                self._location.append(random.randint(0, self._num_pixels - rSpread - 1) / 300)
-                self._displacement.append(random.randint(5, 50) / 300)
-                self._heightactivator.append(random.choice([True, False]))
-                self._lightflip.append(random.choice([True, False]))
-                self._offset.append(random.uniform(0, 6.5) / 300)
-                self._swingspeed.append(random.uniform(0, 1))
+                pendulums.append((rSpread / 300,
+                                  random.randint(0, self._num_pixels - rSpread - 1) / 300,
+                                  random.randint(5, 50) / 300,
+                                  random.choice([True, False]),
+                                  random.choice([True, False]),
+                                  random.uniform(0, 6.5) / 300,
+                                  random.uniform(0, 1)))
+            # one array per pendulum parameter
+            (self._spread, self._location, self._displacement, self._heightactivator, self._lightflip, self._offset,
+             self._swingspeed) = (np.array(param) for param in zip(*pendulums))
+        if self._blobs is None or self._blobs.shape != (len(self._spread), self._num_pixels):
+            # spline coefficients of all blobs
+            self._blobs = _spline_coefficients(
+                np.array([self.createBlob(spread, location) for spread, location in zip(self._spread, self._location)]))
+        if self._output is None or self._output.shape[1] != self._num_pixels:
+            self._output = np.zeros((3, self._num_pixels), dtype=np.float32)
 
     def process(self):
         if self._inputBuffer is None or self._outputBuffer is None:
@@ -885,24 +1004,18 @@ class RandomPendulums(Effect):
             color = self._inputBuffer[0]
         else:
             # default: all white
-            color = np.ones(self._num_pixels) * np.array([[255.0], [255.0], [255.0]])
-
-        self._output = np.zeros(self._num_pixels) * np.array([[0.0], [0.0], [0.0]])
-        for i in range(self.num_pendulums):
-            if self._heightactivator[i] is True:
-                if self._lightflip[i] is True:
-                    lightconfig = -1.0
-                else:
-                    lightconfig = 1.0
-                configArray = lightconfig * self.dim * math.cos(2 * self._t + self._offset[i]) * np.array([[1.0], [1.0], [1.0]
-                                                                                                           ])
-            else:
-                configArray = np.array([[1.0 * self.dim], [1.0 * self.dim], [1.0 * self.dim]])
-            self._output += np.multiply(
-                color,
-                self.controlBlobs(self._spread[i], self._location[i], self._displacement[i], self._offset[i],
-                                  self._swingspeed[i]) * configArray)
-        self._outputBuffer[0] = self._output.clip(0.0, 255.0)
+            color = _default_color(self._num_pixels)
+
+        # Move and sum up all pendulums at once
+        displacement = self._displacement * self._num_pixels * np.sin(self._t * self._swingspeed
+                                                                      + self._offset * self._num_pixels)
+        lightconfig = np.where(self._lightflip, -1.0, 1.0)
+        brightness = self.dim * np.where(self._heightactivator, lightconfig * np.cos(2 * self._t + self._offset), 1.0)
+        blobs = _spline_shift_wrap(self._blobs, displacement)
+        blobs.clip(0.0, 255.0, out=blobs)
+        np.multiply(color, np.dot(brightness.astype(blobs.dtype), blobs), out=self._output)
+        self._output.clip(0.0, 255.0, out=self._output)
+        self._outputBuffer[0] = self._output
 
 
 class StaticBlob(Effect):
@@ -919,6 +1032,7 @@ class StaticBlob(Effect):
 
     def __initstate__(self):
         # state
+        self._output = None
         super(StaticBlob, self).__initstate__()
 
     def __setstate__(self, state):
@@ -947,16 +1061,15 @@ class StaticBlob(Effect):
         return help
 
     def createBlob(self, spread_rel, location_rel):
-        blobArray = np.zeros(self._num_pixels)
+        blobArray = np.zeros(self._num_pixels, dtype=np.float32)
 
         # convert relative to absolute values
         spread = max(int(spread_rel * self._num_pixels), 1)
         location = int(location_rel * self._num_pixels)
-        for i in range(-spread, spread + 1):
-            # make sure we are in bounds of array
-            if (location + i) >= 0 and (location + i) < self._num_pixels:
-                blobArray[location + i] = math.cos((math.pi / spread) * i)
-        return blobArray.clip(0.0, 255.0)
+        # offsets within bounds of array
+        i = np.arange(max(-spread, -location), min(spread, self._num_pixels - 1 - location) + 1)
+        blobArray[location + i] = np.cos((math.pi / spread) * i)
+        return blobArray.clip(0.0, 255.0, out=blobArray)
 
     def numInputChannels(self):
         return 1
@@ -964,6 +1077,13 @@ class StaticBlob(Effect):
     def numOutputChannels(self):
         return 1
 
+    async def update(self, dt):
+        await super().update(dt)
+        if self._num_pixels is None:
+            return
+        if self._output is None or self._output.shape[1] != self._num_pixels:
+            self._output = np.zeros((3, self._num_pixels), dtype=np.float32)
+
     def process(self):
         if self._inputBuffer is None or self._outputBuffer is None:
             return
@@ -971,10 +1091,11 @@ class StaticBlob(Effect):
             color = self._inputBuffer[0]
         else:
             # default: all white
-            color = np.ones(self._num_pixels) * np.array([[255.0], [255.0], [255.0]])
-        self._output = np.multiply(color, self.createBlob(self.spread, self.location) * np.array([[1.0], [1.0], [1.0]]))
+            color = _default_color(self._num_pixels)
+        np.multiply(color, self.createBlob(self.spread, self.location), out=self._output)
 
-        self._outputBuffer[0] = self._output.clip(0.0, 255.0)
+        self._output.clip(0.0, 255.0, out=self._output)
+        self._outputBuffer[0] = self._output
 
 
 class StaticWave(Effect):
@@ -992,6 +1113,7 @@ class StaticWave(Effect):
 
     def __initstate__(self):
         # state
+        self._output = None
         super(StaticWave, self).__initstate__()
 
     def __setstate__(self, state):
@@ -1026,16 +1148,15 @@ class StaticWave(Effect):
         return definition
 
     def createBlob(self, spread_rel, location_rel):
-        waveArray = np.zeros(self._num_pixels)
+        waveArray = np.zeros(self._num_pixels, dtype=np.float32)
 
         # convert relative to absolute values
         spread = max(int(spread_rel * self._num_pixels), 1)
         location = int(location_rel * self._num_pixels)
-        for i in range(1, spread + 1):
-            # make sure we are in bounds of array
-            if (location + i) >= 0 and (location + i) < self._num_pixels:
-                waveArray[location + i] = spread / 20 / (i + 1)
-        return waveArray.clip(0.0, 255.0)
+        # offsets within bounds of array
+        i = np.arange(max(1, -location), min(spread, self._num_pixels - 1 - location) + 1)
+        waveArray[location + i] = (spread / 20) / (i + 1)
+        return waveArray.clip(0.0, 255.0, out=waveArray)
 
     def numInputChannels(self):
         return 1
@@ -1043,6 +1164,13 @@ class StaticWave(Effect):
     def numOutputChannels(self):
         return 1
 
+    async def update(self, dt):
+        await super().update(dt)
+        if self._num_pixels is None:
+            return
+        if self._output is None or self._output.shape[1] != self._num_pixels:
+            self._output = np.zeros((3, self._num_pixels), dtype=np.float32)
+
     def process(self):
         if self._inputBuffer is None or self._outputBuffer is None:
             return
@@ -1050,10 +1178,11 @@ class StaticWave(Effect):
             color = self._inputBuffer[0]
         else:
             # default: all white
-            color = np.ones(self._num_pixels) * np.array([[255.0], [255.0], [255.0]])
-        self._output = np.multiply(color, self.createBlob(self.spread, self.location) * np.array([[1.0], [1.0], [1.0]]))
+            color = _default_color(self._num_pixels)
+        np.multiply(color, self.createBlob(self.spread, self.location), out=self._output)
 
-        self._outputBuffer[0] = self._output.clip(0.0, 255.0)
+        self._output.clip(0.0, 255.0, out=self._output)
+        self._outputBuffer[0] = self._output
 
 
 class GenerateWaves(Effect):
@@ -1079,6 +1208,7 @@ class GenerateWaves(Effect):
         # state
         self._wavearray = None
         self._outputarray = []
+        self._output = None
 
         super(GenerateWaves, self).__initstate__()
 
@@ -1117,25 +1247,24 @@ class GenerateWaves(Effect):
         return definition
 
     def createSin(self, period, scale):
-        outputarray = np.zeros(self._num_pixels)
-        for i in range(0, self._num_pixels):
-            outputarray[i] = 0.5 * scale - math.sin(math.pi / self.period * i) * 0.5 * scale
+        outputarray = np.arange(self._num_pixels, dtype=np.float32)
+        outputarray = 0.5 * scale - np.sin(math.pi / self.period * outputarray) * 0.5 * scale
         return outputarray
 
     def createSawtooth(self, period, scale):
         outputarray = np.linspace(0, self._num_pixels, self._num_pixels)
         outputarray = 0.5 * scale - signal.sawtooth(outputarray * math.pi / self.period, width=1) * 0.5 * scale
-        return outputarray
+        return outputarray.astype(np.float32)
 
     def createSawtoothReversed(self, period, scale):
         outputarray = np.linspace(0, self._num_pixels, self._num_pixels)
         outputarray = 0.5 * scale - signal.sawtooth(outputarray * math.pi / self.period, width=0) * 0.5 * scale
-        return outputarray
+        return outputarray.astype(np.float32)
 
     def createSquare(self, period, scale):
         outputarray = np.linspace(0, self._num_pixels, self._num_pixels)
         outputarray = 0.5 * scale - signal.square(outputarray * math.pi / self.period) * 0.5 * scale
-        return outputarray
+        return outputarray.astype(np.float32)
 
     def numInputChannels(self):
         return 1
@@ -1156,16 +1285,18 @@ class GenerateWaves(Effect):
                 self._wavearray = self.createSawtoothReversed(self.period, self.scale)
             elif self.wavemode == 'square':
                 self._wavearray = self.createSquare(self.period, self.scale)
+        if self._output is None or self._output.shape[1] != self._num_pixels:
+            self._output = np.zeros((3, self._num_pixels), dtype=np.float32)
 
     def process(self):
         if self._outputBuffer is not None:
             color = self._inputBuffer[0]
             if color is None:
-                color = np.ones(self._num_pixels) * np.array([[255.0], [255.0], [255.0]])
+                color = _default_color(self._num_pixels)
 
-            output = np.multiply(color, self._wavearray * np.array([[1.0], [1.0], [1.0]]))
-
-            self._outputBuffer[0] = output.clip(0.0, 255.0)
+            np.multiply(color, self._wavearray, out=self._output)
+            self._output.clip(0.0, 255.0, out=self._output)
+            self._outputBuffer[0] = self._output
 
 
 class Sorting(Effect):
@@ -1181,17 +1312,21 @@ class Sorting(Effect):
             sortby=sortbydefault,
             reversed=False,
             looping=True,
+            passes=1,
     ):
 
         self.sortby = sortby
         self.reversed = reversed
         self.looping = looping
+        self.passes = passes
         self.__initstate__()
 
     def __initstate__(self):
         # state
         self._output = None
+        self._pixels = None
         self._sorting_done = True
+        self._rng = np.random.default_rng()
         super(Sorting, self).__initstate__()
 
     @staticmethod
@@ -1201,7 +1336,8 @@ class Sorting(Effect):
                 # default, min, max, stepsize
                 ("sortby", sortby),
                 ("reversed", False),
-                ("looping", True)
+                ("looping", True),
+                ("passes", [1, 1, 20, 1]),
             ])
         }
         return definition
@@ -1220,71 +1356,53 @@ class Sorting(Effect):
                 "Flips the parameter which is sorted by.",
                 "looping":
                 "If activated, the effect randomly picks another parameter to sort by. "
-                "If deactivated, the effects spawns a new pattern after sorting."
+                "If deactivated, the effects spawns a new pattern after sorting.",
+                "passes":
+                "Number of sorting passes per frame. Increase this value to sort long strips faster."
             }
         }
         return help
 
     def disorder(self):
-        self._output = np.ones(self._num_pixels) * np.array([[1.0], [1.0], [1.0]])
-        for i in range(self._num_pixels):
-            for j in range(len(self._output)):
-                self._output[j][i] = random.randint(0.0, 255.0)
+        # one pixel per row, padded to 4 bytes so a whole pixel can be swapped as a single word
+        if self._output is None or self._output.shape[0] != self._num_pixels:
+            self._output = np.zeros((self._num_pixels, 4), dtype=np.uint8)
+        self._output[:, :3] = self._rng.integers(0, 256, size=(self._num_pixels, 3), dtype=np.uint8)
         return self._output
 
     def bubble(self, inputArray, sortby, reversed, looping):
-        if sortby == 'red':
-            sortindex = 0
-        elif sortby == 'green':
-            sortindex = 1
-        elif sortby == 'blue':
-            sortindex = 2
-        elif sortby == 'brightness':
-            sortindex = 3
-        else:
+        if sortby not in sortby_key:
             raise NotImplementedError("Sorting not implemented.")
-
-        if reversed:
-            flip_index = -1
-        else:
-            flip_index = 1
-
-        for passnum in range(len(inputArray[0]) - 1, 0, -1):
-            check = 0
-            for i in range(passnum):
-                if sortindex == 0 or sortindex == 1 or sortindex == 2:  # sorting by color
-                    if inputArray[sortindex][i] > inputArray[sortindex][i + 1 * flip_index]:
-                        temp = np.array([[1.0], [1.0], [1.0]])
-                        for j in range(len(inputArray)):
-                            temp[j] = inputArray[j][i]
-                            inputArray[j][i] = inputArray[j][i + 1 * flip_index]
-                            inputArray[j][i + 1 * flip_index] = temp[j]
-                    else:
-                        check += 1
-                        if check == passnum:
-                            if looping is True:
-                                self.sortby = random.choice(['red', 'green', 'blue', 'brightness'])
-                                self.reversed = random.choice([True, False])
-                            else:
-                                self._sorting_done = True
-
-                elif sortindex == 3:  # sorting by brightness
-                    tempArray = np.sum(inputArray, axis=0)
-                    if tempArray[i] > tempArray[i + 1 * flip_index]:
-                        temp = np.array([[1.0], [1.0], [1.0]])
-                        for j in range(len(inputArray)):
-                            temp[j] = inputArray[j][i]
-                            inputArray[j][i] = inputArray[j][i + 1 * flip_index]
-                            inputArray[j][i + 1 * flip_index] = temp[j]
-                    else:
-                        check += 1
-                        if check == passnum:
-                            if looping is True:
-                                self.sortby = random.choice(['red', 'green', 'blue', 'brightness'])
-                                self.reversed = random.choice([True, False])
-                            else:
-                                self._sorting_done = True
-            return inputArray
+        sort_key = sortby_key[sortby]
+
+        # RGB and padding byte of each pixel as one uint32
+        pixels = inputArray.view(np.uint32)[:, 0]
+        # One pass of an odd-even transposition sort: compare and swap all even pairs, then all odd pairs
+        check = True
+        for start in (0, 1):
+            key = sort_key(inputArray)
+            left = key[start:-1:2]
+            right = key[start + 1::2]
+            if reversed:
+                swap = left < right
+            else:
+                swap = left > right
+            if np.any(swap):
+                check = False
+                # branchless swap of the selected pairs: x ^= (x ^ y) & mask for both neighbours
+                pixels_left = pixels[start:-1:2]
+                pixels_right = pixels[start + 1::2]
+                diff = (pixels_left ^ pixels_right) * swap
+                pixels_left ^= diff
+                pixels_right ^= diff
+        if check:
+            # nothing swapped, input is sorted
+            if looping is True:
+                self.sortby = random.choice(['red', 'green', 'blue', 'brightness'])
+                self.reversed = random.choice([True, False])
+            else:
+                self._sorting_done = True
+        return inputArray
 
     def numInputChannels(self):
         return 0
@@ -1296,9 +1414,11 @@ class Sorting(Effect):
         await super().update(dt)
         if self._num_pixels is None:
             return
-        if self._output is None or np.size(self._output, 1) != self._num_pixels:
+        if self._output is None or self._output.shape[0] != self._num_pixels:
             self._output = self.disorder()
             self._sorting_done = False
+        if self._pixels is None or self._pixels.shape[1] != self._num_pixels:
+            self._pixels = np.zeros((3, self._num_pixels), dtype=np.float32)
 
     def process(self):
         if self._inputBuffer is None or self._outputBuffer is None:
@@ -1308,8 +1428,13 @@ class Sorting(Effect):
             self._output = self.disorder()
             self._sorting_done = False
 
-        self._output = self.bubble(self._output, self.sortby, self.reversed, self.looping)
-        self._outputBuffer[0] = self._output.clip(0.0, 255.0)
+        for _ in range(int(self.passes)):
+            self._output = self.bubble(self._output, self.sortby, self.reversed, self.looping)
+            if self._sorting_done:
+                break
+        # _output is the 8 bit sort state with one pixel per row, hand out a float copy
+        np.copyto(self._pixels, self._output[:, :3].T)
+        self._outputBuffer[0] = self._pixels
 
 
 class GIFPlayer(Effect):
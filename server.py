@@ -908,21 +908,31 @@ def create_app():
 
 
 def strandTest(dev, num_pixels):
-    pixels = np.zeros(int(num_pixels / 2)) * np.array([[255.0], [255.0], [255.0]])
-    t = 0.0
+    pixels = np.zeros((3, int(num_pixels / 2)))
+    # strand is mirrored at the center, both halves are written into the same buffer each frame
+    half = pixels.shape[1]
+    frame = np.zeros((3, 2 * half))
+    # rainbow colors for the first half of the test, the rest of the frames push in black
+    num_lit = num_pixels - num_pixels // 2
+    rainbow = np.array([colorsys.hsv_to_rgb(i / num_pixels, 1.0, 1.0) for i in range(0, num_lit)]).T * 255.0
     dt = 1.0 / num_pixels
+    # frames are scheduled against a monotonic deadline so the time spent in dev.show does not add up
+    deadline = time.perf_counter()
     for i in range(0, int(num_pixels * 1.2)):
-        h = t / dt / num_pixels
-        r, g, b, = 0, 0, 0
-        if i < num_pixels / 2:
-            r, g, b = colorsys.hsv_to_rgb(h, 1.0, 1.0)
-        pixels = np.roll(pixels, -1, axis=1)
-        pixels[0][0] = r * 255.0
-        pixels[1][0] = g * 255.0
-        pixels[2][0] = b * 255.0
-        dev.show(np.concatenate((pixels, pixels[:, ::-1]), axis=1))
-        t = t + dt
-        time.sleep(dt)
+        # pixels is a ring buffer, the newest color goes to the first LED followed by the oldest one
+        head = i % half
+        if i < rainbow.shape[1]:
+            pixels[:, head] = rainbow[:, i]
+        else:
+            pixels[:, head] = 0.0
+        frame[:, :half - head] = pixels[:, head:]
+        frame[:, half - head:half] = pixels[:, :head]
+        frame[:, half:] = frame[:, half - 1::-1]
+        dev.show(frame)
+        deadline += dt
+        remaining = deadline - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
 
 def startMIDIThread(callback):
     global midiThread
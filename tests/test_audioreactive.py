@@ -0,0 +1,40 @@
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+from __future__ import absolute_import
+import unittest
+import asyncio
+import random
+import numpy as np
+from audioled import audioreactive, effect
+
+
+class Test_FallingStars(unittest.TestCase):
+    def _run(self, star, audio, dt, frames):
+        buffer = effect.AudioBuffer(48000)
+        buffer.audio = audio
+        star._inputBuffer[0] = buffer
+        event_loop = asyncio.new_event_loop()
+        for i in range(frames):
+            event_loop.run_until_complete(star.update(dt))
+            star.process()
+        event_loop.close()
+        return star._outputBuffer[0]
+
+    def test_starsSpawnAgainAfterSilence(self):
+        random.seed(0)
+        star = audioreactive.FallingStars(probability=0.0)
+        star.setNumOutputPixels(100)
+        star.setInputBuffer([None, None])
+        star.setOutputBuffer([None])
+        loud = 0.9 * np.sin(2 * np.pi * 100.0 * np.arange(1024) / 48000)
+        silence = np.zeros(1024)
+
+        self.assertGreater(np.max(self._run(star, loud, 0.02, 5)), 0.0)
+        # let all stars fade out
+        self.assertEqual(np.max(self._run(star, silence, 1.0, 10)), 0.0)
+        self.assertGreater(np.max(self._run(star, loud, 0.02, 1)), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
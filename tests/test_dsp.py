@@ -39,6 +39,25 @@ class TestDSP(unittest.TestCase):
     #     plt.plot(bins, energy)
     #     plt.show()
 
+    def test_warped_psd_multi(self):
+        """Verify a shared FFT yields the same spectra as separate calls"""
+        y = np.random.normal(size=1024)
+        franges = [[32.7, 261.0], [261.0, 8000.0]]
+        multi = dsp.warped_psd_multi(y, 24, 22050, franges, 'bark')
+        for frange, psd in zip(franges, multi):
+            single = np.abs(np.fft.rfft(y))**2 * (2 / len(y))
+            bank, _ = dsp.filter_bank(24, len(y), 22050, frange[0], frange[1], 'bark')
+            self.assertTrue(np.allclose(psd, np.dot(bank, single)))
+
+    def test_resample(self):
+        """Verify resampling with the cached filter matches scipy's resample_poly"""
+        from scipy.signal import resample_poly
+        y = np.random.normal(size=480)
+        for up, down in [(300, 480), (60, 479), (200, 100)]:
+            resampled = dsp.resample(y, up, down)
+            self.assertTrue(np.allclose(resampled, resample_poly(y, up, down)))
+            self.assertEqual(len(resampled), -(-len(y) * up // down))
+
     # def test_rollwin_output(self):
     #     """Verify correct rolling window output for rollwin generator"""
     #     # Verify output with an even window length
@@ -113,6 +132,70 @@ class TestDSP(unittest.TestCase):
         signal = np.array(list(signal))
         self.assertTrue((signal == 0).all())
 
+    def test_shift_wrap(self):
+        """Verifies fractional shift with wrap-around"""
+        data_in = np.arange(8, dtype=float)
+        out = np.zeros(8)
+
+        # Integer shifts behave like np.roll
+        dsp.shift_wrap(data_in, 3, out)
+        self.assertTrue((out == np.roll(data_in, 3)).all())
+        dsp.shift_wrap(data_in, -2, out)
+        self.assertTrue((out == np.roll(data_in, -2)).all())
+
+        # Fractional shifts interpolate linearly between neighbours
+        dsp.shift_wrap(data_in, 0.5, out)
+        self.assertTrue(np.isclose(out, 0.5 * (data_in + np.roll(data_in, 1))).all())
+
+        # Shifting works along the last axis of 2D arrays
+        data_in = np.tile(data_in, (3, 1))
+        out = np.zeros((3, 8))
+        dsp.shift_wrap(data_in, 1, out)
+        self.assertTrue((out == np.roll(data_in, 1, axis=1)).all())
+
+    def test_rolling_rms(self):
+        """Verifies RollingRms matches rms over the last n values"""
+        values = np.random.rand(20)
+        rolling = dsp.RollingRms(5)
+        for i, value in enumerate(values):
+            expected = dsp.rms(values[max(0, i - 4):i + 1])
+            self.assertAlmostEqual(rolling.push(value), expected)
+
+    def test_rolling_rms_silence_after_burst(self):
+        """Verifies RollingRms returns exactly zero once only silence is left in the window"""
+        rolling = dsp.RollingRms(5)
+        for value in [0.5, 0.7, 0.6, 0.5, 0.4, 0.6, 0.4]:
+            rolling.push(value)
+        for i in range(5):
+            result = rolling.push(0.0)
+        self.assertEqual(result, 0.0)
+
+    def test_rolling_max(self):
+        """Verifies RollingMax matches max over the last n values"""
+        values = np.random.rand(20)
+        rolling = dsp.RollingMax(5)
+        for i, value in enumerate(values):
+            expected = np.max(values[max(0, i - 4):i + 1])
+            self.assertEqual(rolling.push(value), expected)
+
+    def test_rolling_resize(self):
+        """Verifies RollingRms and RollingMax keep their history when the window size changes"""
+        sizes = [5] * 8 + [2] * 4 + [7] * 10 + [1] * 3 + [4] * 10 + [6] * 5
+        values = np.random.rand(len(sizes))
+        values[10:20] = 0.0
+        rolling_rms = dsp.RollingRms(sizes[0])
+        rolling_max = dsp.RollingMax(sizes[0])
+        hold_values = []
+        for size, value in zip(sizes, values):
+            # list with the newest value first, trimmed to the window size
+            while len(hold_values) > size - 1:
+                hold_values.pop()
+            hold_values.insert(0, value)
+            rolling_rms.resize(size)
+            rolling_max.resize(size)
+            self.assertAlmostEqual(rolling_rms.push(value), dsp.rms(hold_values))
+            self.assertEqual(rolling_max.push(value), np.max(hold_values))
+
 
 if __name__ == '__main__':
     unittest.main()
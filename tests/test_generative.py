@@ -0,0 +1,58 @@
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+from __future__ import absolute_import
+import unittest
+from unittest import mock
+import asyncio
+import mido
+import numpy as np
+from scipy import ndimage
+from audioled import generative
+
+
+class Test_MidiKeyboard(unittest.TestCase):
+    def setUp(self):
+        self.midiIn = mock.Mock()
+        self.midiIn.iter_pending.return_value = []
+        with mock.patch('mido.open_input', return_value=self.midiIn):
+            self.keyboard = generative.MidiKeyboard()
+        self.keyboard.setNumOutputPixels(10)
+        self.keyboard.setInputBuffer([None])
+        self.keyboard.setOutputBuffer([None])
+        self.event_loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.event_loop.close()
+
+    def _frame(self, *messages):
+        self.midiIn.iter_pending.return_value = list(messages)
+        self.event_loop.run_until_complete(self.keyboard.update(0.01))
+        self.keyboard.process()
+        # notes 60 and 61 are both drawn to pixel 4
+        return self.keyboard._outputBuffer[0][0, 4]
+
+    def test_lastPressedNoteWinsSharedPixel(self):
+        self.assertAlmostEqual(self._frame(mido.Message('note_on', note=61, velocity=100)), 100 / 127 * 255, places=3)
+        self.assertAlmostEqual(self._frame(mido.Message('note_on', note=60, velocity=50)), 50 / 127 * 255, places=3)
+        self.assertAlmostEqual(self._frame(mido.Message('note_off', note=60)), 100 / 127 * 255, places=3)
+        self.assertEqual(self._frame(mido.Message('note_off', note=61)), 0.0)
+
+    def test_repeatedNoteOnRestartsNote(self):
+        self.assertAlmostEqual(self._frame(mido.Message('note_on', note=60, velocity=100)), 100 / 127 * 255, places=3)
+        self.assertAlmostEqual(self._frame(mido.Message('note_on', note=60, velocity=50)), 50 / 127 * 255, places=3)
+        self.assertEqual(self._frame(mido.Message('note_off', note=60)), 0.0)
+
+
+class Test_SplineShift(unittest.TestCase):
+    def test_matchesNdimageShift(self):
+        for num_pixels in [1, 2, 30, 300]:
+            rows = np.random.rand(5, num_pixels)
+            shifts = np.random.uniform(-2.0 * num_pixels, 2.0 * num_pixels, 5)
+            shifted = generative._spline_shift_wrap(generative._spline_coefficients(rows), shifts)
+            for row, shift, result in zip(rows, shifts, shifted):
+                np.testing.assert_allclose(result, ndimage.shift(row, shift, order=3, mode='grid-wrap'), atol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()